@@ -0,0 +1,58 @@
+"""Redesign item and user indexes
+
+Index item by (owner_id, id), which serves both the owner filter and the
+keyset pagination of owner listings, and drop the indexes no query uses:
+the ones on the primary keys and the plain B-trees on text columns.
+
+Indexes are built and dropped CONCURRENTLY, outside of the migration
+transaction, so the tables stay writable while this runs.
+
+Revision ID: 3a9c5f1e7b2d
+Revises: d4867f3a4c0a
+Create Date: 2026-10-18 10:12:41.508213
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3a9c5f1e7b2d"
+down_revision = "d4867f3a4c0a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_item_owner_id_id",
+            "item",
+            ["owner_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_item_description", table_name="item", postgresql_concurrently=True)
+        op.drop_index("ix_item_title", table_name="item", postgresql_concurrently=True)
+        op.drop_index("ix_item_id", table_name="item", postgresql_concurrently=True)
+        op.drop_index("ix_user_id", table_name="user", postgresql_concurrently=True)
+        op.drop_index("ix_user_full_name", table_name="user", postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_full_name", "user", ["full_name"], unique=False, postgresql_concurrently=True
+        )
+        op.create_index("ix_user_id", "user", ["id"], unique=False, postgresql_concurrently=True)
+        op.create_index("ix_item_id", "item", ["id"], unique=False, postgresql_concurrently=True)
+        op.create_index(
+            "ix_item_title", "item", ["title"], unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_item_description",
+            "item",
+            ["description"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_item_owner_id_id", table_name="item", postgresql_concurrently=True)
@@ -0,0 +1,58 @@
+"""Add a full-text search vector to item
+
+`search_vector` is a stored generated column, computed by the database from
+the title (weight A) and description (weight B), with a GIN index serving
+the `@@` matches of `GET /items/search`.
+
+Adding a stored generated column rewrites the table under an exclusive
+lock, so run this in a maintenance window on large tables. The index is then
+built CONCURRENTLY, outside of the migration transaction.
+
+Revision ID: 5c1d9a7e3f60
+Revises: 8f2e6b1c4d7a
+Create Date: 2026-10-18 17:26:08.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1d9a7e3f60"
+down_revision = "8f2e6b1c4d7a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "item",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_item_search_vector",
+            "item",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_item_search_vector", table_name="item", postgresql_concurrently=True
+        )
+    op.drop_column("item", "search_vector")
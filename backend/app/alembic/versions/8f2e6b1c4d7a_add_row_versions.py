@@ -0,0 +1,34 @@
+"""Add row versions to item and user
+
+`version` is bumped by every update made through CRUDBase and is part of
+the ETag of the item and user reads. With a constant default, adding the
+column doesn't rewrite the tables.
+
+Revision ID: 8f2e6b1c4d7a
+Revises: 3a9c5f1e7b2d
+Create Date: 2026-10-18 14:03:27.114936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8f2e6b1c4d7a"
+down_revision = "3a9c5f1e7b2d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "user", sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+    )
+    op.add_column(
+        "item", sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column("item", "version")
+    op.drop_column("user", "version")
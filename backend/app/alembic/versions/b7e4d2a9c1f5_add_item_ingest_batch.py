@@ -0,0 +1,56 @@
+"""Add item_ingest_batch
+
+One row per batch of items ingested by the `ingest_items` task, written in
+the same transaction as the items, so that a batch delivered again after
+its commit is skipped instead of inserted twice.
+
+Revision ID: b7e4d2a9c1f5
+Revises: 5c1d9a7e3f60
+Create Date: 2026-10-18 18:41:09.522310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e4d2a9c1f5"
+down_revision = "5c1d9a7e3f60"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "item_ingest_batch",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "item_ids",
+            postgresql.ARRAY(sa.Integer()),
+            server_default="{}",
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_item_ingest_batch_created_at"),
+        "item_ingest_batch",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_item_ingest_batch_created_at"), table_name="item_ingest_batch"
+    )
+    op.drop_table("item_ingest_batch")
@@ -1,99 +1,304 @@
-from typing import Any, List
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Security
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, Security
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, models, schemas
 from app import dependencies as deps
+from app.api.responses import etag, etag_matches, fast_json, not_modified, serialize_item
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Item])
-def read_items(
-    db: Session = Depends(deps.get_db),
+async def read_items(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Security(deps.get_current_active_user, scopes=["items:read"]),
+    cursor: Optional[str] = None,
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:read"]),
 ) -> Any:
     """
     Retrieve items.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next
+    page; `skip` is only used when no cursor is given.
     """
     if crud.user.is_superuser(current_user):
-        items = crud.item.get_multi(db, skip=skip, limit=limit)
+        items = await crud.item.get_multi_async(
+            db, skip=skip, limit=limit, cursor=cursor
+        )
     else:
-        items = crud.item.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+        items = await crud.item.get_multi_by_owner_async(
+            db=db, owner_id=current_user.id, skip=skip, limit=limit, cursor=cursor
         )
-    return items
+    next_cursor = crud.item.next_cursor(items, limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return fast_json(items, serialize_item, headers=headers)
 
 
 @router.post("/", response_model=schemas.Item)
-def create_item(
+async def create_item(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     item_in: schemas.ItemCreate,
-    current_user: models.User = Security(deps.get_current_active_user, scopes=["items:create"]),
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:create"]),
 ) -> Any:
     """
     Create new item.
     """
-    item = crud.item.create_with_owner(db=db, obj_in=item_in, owner_id=current_user.id)
+    item = await crud.item.create_with_owner_async(db=db, obj_in=item_in, owner_id=current_user.id)
     return item
 
 
+EXPORT_MEDIA_TYPES = {
+    schemas.ItemExportFormat.ndjson: "application/x-ndjson",
+    schemas.ItemExportFormat.csv: "text/csv",
+}
+
+
+async def export_rows(
+    format: schemas.ItemExportFormat, owner_id: Optional[int]
+) -> AsyncIterator[str]:
+    fields = list(schemas.Item.__fields__)
+    # The export outlives the request's dependencies, so it uses its own session
+    async with AsyncSessionLocal() as db:
+        if format == schemas.ItemExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+        async for rows in crud.item.stream_async(
+            db, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+        ):
+            if format == schemas.ItemExportFormat.csv:
+                writer.writerows([[row._mapping[field] for field in fields] for row in rows])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield "".join(
+                    json.dumps({field: row._mapping[field] for field in fields}) + "\n"
+                    for row in rows
+                )
+        if format == schemas.ItemExportFormat.csv and buffer.tell():
+            yield buffer.getvalue()
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    },
+)
+async def export_items(
+    format: schemas.ItemExportFormat = schemas.ItemExportFormat.ndjson,
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:read"]),
+) -> Any:
+    """
+    Export items, one per line, as NDJSON or CSV.
+
+    The rows are streamed as they are read, so memory use doesn't grow with
+    the number of items.
+    """
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    return StreamingResponse(
+        export_rows(format, owner_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=items.{format.value}"},
+    )
+
+
+@router.get("/search", response_model=List[schemas.Item])
+async def search_items(
+    db: AsyncSession = Depends(deps.get_async_db),
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(settings.SEARCH_MAX_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:read"]),
+) -> Any:
+    """
+    Search items by title and description, best match first.
+
+    `q` takes words, "quoted phrases", `or` and `-excluded` words. Pass the
+    `X-Next-Cursor` response header back as `cursor` to get the next page.
+    """
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    items, next_cursor = await crud.item.search_async(
+        db, q=q, owner_id=owner_id, limit=limit, cursor=cursor
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return fast_json(items, serialize_item, headers=headers)
+
+
+def check_bulk_size(rows: Sequence[Any]) -> None:
+    if len(rows) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A bulk request accepts at most {settings.BULK_MAX_ITEMS} items",
+        )
+
+
+def check_bulk_ids(
+    ids: Sequence[int], owners: Dict[int, int], current_user: models.User
+) -> Tuple[List[int], List[schemas.BulkError]]:
+    """
+    Split the rows of a bulk request into the indexes that may be written and
+    the errors of the others.
+    """
+    is_superuser = crud.user.is_superuser(current_user)
+    seen = set()
+    allowed, errors = [], []
+    for index, id in enumerate(ids):
+        if id in seen:
+            detail = "Duplicate item id"
+        elif id not in owners:
+            detail = "Item not found"
+        elif not is_superuser and owners[id] != current_user.id:
+            detail = "Not enough permissions"
+        else:
+            detail = ""
+        seen.add(id)
+        if detail:
+            errors.append(schemas.BulkError(index=index, id=id, detail=detail))
+        else:
+            allowed.append(index)
+    return allowed, errors
+
+
+@router.post("/bulk", response_model=schemas.ItemBulkResult)
+async def create_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    items_in: List[schemas.ItemCreate],
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:create"]),
+) -> Any:
+    """
+    Create many items in one transaction.
+    """
+    check_bulk_size(items_in)
+    items = await crud.item.create_many_with_owner_async(
+        db=db, objs_in=items_in, owner_id=current_user.id
+    )
+    return {"items": items, "errors": []}
+
+
+@router.patch("/bulk", response_model=schemas.ItemBulkResult)
+async def update_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    items_in: List[schemas.ItemBulkUpdate],
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:update"]),
+) -> Any:
+    """
+    Update many items in one transaction.
+
+    Rows that can't be updated are reported in `errors` by their index in the
+    request; the others are updated.
+    """
+    check_bulk_size(items_in)
+    ids = [item_in.id for item_in in items_in]
+    owners = await crud.item.get_owners_async(db=db, ids=ids)
+    allowed, errors = check_bulk_ids(ids, owners, current_user)
+    items = await crud.item.update_many_async(
+        db=db, objs_in={ids[index]: items_in[index] for index in allowed}
+    )
+    return {"items": items, "errors": errors}
+
+
+@router.delete("/bulk", response_model=schemas.ItemBulkResult)
+async def delete_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    ids: List[int] = Body(...),
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:delete"]),
+) -> Any:
+    """
+    Delete many items, given as a list of ids, in one transaction.
+
+    Rows that can't be deleted are reported in `errors` by their index in the
+    request; the others are deleted.
+    """
+    check_bulk_size(ids)
+    owners = await crud.item.get_owners_async(db=db, ids=ids)
+    allowed, errors = check_bulk_ids(ids, owners, current_user)
+    items = await crud.item.remove_many_async(db=db, ids=[ids[index] for index in allowed])
+    return {"items": items, "errors": errors}
+
+
 @router.put("/{id}", response_model=schemas.Item)
-def update_item(
+async def update_item(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
     item_in: schemas.ItemUpdate,
-    current_user: models.User = Security(deps.get_current_active_user, scopes=["items:update"]),
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:update"]),
 ) -> Any:
     """
     Update an item.
     """
-    item = crud.item.get(db=db, id=id)
+    item = await crud.item.get_async(db=db, id=id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not crud.user.is_superuser(current_user) and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    item = crud.item.update(db=db, db_obj=item, obj_in=item_in)
+    item = await crud.item.update_async(db=db, db_obj=item, obj_in=item_in)
     return item
 
 
-@router.get("/{id}", response_model=schemas.Item)
-def read_item(
+@router.get(
+    "/{id}", response_model=schemas.Item, responses={304: {"description": "Not Modified"}}
+)
+async def read_item(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Security(deps.get_current_active_user, scopes=["items:read"]),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:read"]),
 ) -> Any:
     """
     Get item by ID.
+
+    Answers 304 when `If-None-Match` has the item's current `ETag`.
     """
-    item = crud.item.get(db=db, id=id)
+    if if_none_match:
+        current = await crud.item.get_version_async(db=db, id=id, columns=["owner_id"])
+        if current and (
+            crud.user.is_superuser(current_user) or current["owner_id"] == current_user.id
+        ):
+            current_etag = etag(schemas.Item, id, current["version"])
+            if etag_matches(if_none_match, current_etag):
+                return not_modified(current_etag)
+    item = await crud.item.get_async(db=db, id=id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not crud.user.is_superuser(current_user) and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
+    response.headers["ETag"] = etag(schemas.Item, item.id, item.version)
     return item
 
 
 @router.delete("/{id}", response_model=schemas.Item)
-def delete_item(
+async def delete_item(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: models.User = Security(deps.get_current_active_user, scopes=["items:delete"]),
+    current_user: models.User = Security(deps.get_current_active_user_async, scopes=["items:delete"]),
 ) -> Any:
     """
     Delete an item.
     """
-    item = crud.item.get(db=db, id=id)
+    item = await crud.item.get_async(db=db, id=id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not crud.user.is_superuser(current_user) and (item.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    item = crud.item.remove(db=db, id=id)
+    item = await crud.item.remove_async(db=db, id=id)
     return item
@@ -1,36 +1,43 @@
 from datetime import timedelta
-from typing import Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 from fastapi import APIRouter, Form, Body, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestFormStrict
-from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app import dependencies as deps
 from app.core import security
+from app.core.celery_app import send_task
 from app.core.config import settings
-from app.core.security import get_password_hash
-from app.utils import (
-    generate_password_reset_token,
-    send_reset_password_email,
-    verify_password_reset_token,
-)
+from app.utils import generate_password_reset_token, verify_password_reset_token
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
+
+
+@lru_cache()
+def templates() -> "Jinja2Templates":
+    # Imported on first use, Jinja2 only renders the OAuth authorization form
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="templates")
 
 
 @router.post("/login/access-token", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestFormStrict = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(deps.get_async_db), form_data: OAuth2PasswordRequestFormStrict = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.user.authenticate(
+    user = await crud.user.authenticate_async(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -67,8 +74,9 @@ def recover_password(email: str, db: Session = Depends(deps.get_db)) -> Any:
             detail="The user with this username does not exist in the system.",
         )
     password_reset_token = generate_password_reset_token(email=email)
-    send_reset_password_email(
-        email_to=user.email, email=email, token=password_reset_token
+    send_task(
+        "app.worker.send_reset_password_email",
+        kwargs={"email_to": user.email, "email": email, "token": password_reset_token},
     )
     return {"msg": "Password recovery email sent"}
 
@@ -93,10 +101,7 @@ def reset_password(
         )
     elif not crud.user.is_active(user):
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(new_password)
-    user.hashed_password = hashed_password
-    db.add(user)
-    db.commit()
+    crud.user.update(db, db_obj=user, obj_in={"password": new_password})
     return {"msg": "Password updated successfully"}
 
 
@@ -104,13 +109,13 @@ def reset_password(
 async def read_authorization_form(
     request: Request, response_type: str, client_id: str, redirect_uri: str, state: str
 ) -> Any:
-    return templates.TemplateResponse("authorization_form.html", {"request": request})
+    return templates().TemplateResponse("authorization_form.html", {"request": request})
 
 
 @router.post("/login/oauth/authorize", response_class=HTMLResponse)
 async def post_authorization_form(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     response_type: str,
     client_id: str,
     redirect_uri: str,
@@ -119,9 +124,9 @@ async def post_authorization_form(
     password: str = Form(...),
     request: Request,
 ) -> Any:
-    user = crud.user.authenticate(
+    user = await crud.user.authenticate_async(
         db, email=username, password=password
     )
     if not user:
-        return templates.TemplateResponse("authorization_form.html", {"request": request, "user": user})
+        return templates().TemplateResponse("authorization_form.html", {"request": request, "user": user})
     return RedirectResponse(f"{redirect_uri}?{response_type}=&state={state}")
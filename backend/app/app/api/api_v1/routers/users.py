@@ -1,40 +1,55 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
+from app.api.responses import etag, etag_matches, fast_json, not_modified, serialize_user
+from app.core.celery_app import send_task
 from app.core.config import settings
-from app.dependencies import get_db, get_current_active_user, get_current_active_superuser
-from app.utils import send_new_account_email
+from app.dependencies import (
+    get_async_db,
+    get_current_active_superuser_async,
+    get_current_active_user,
+    get_current_active_user_async,
+    get_db,
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.User], dependencies=[Depends(get_current_active_superuser)])
-def read_users(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=List[schemas.User], dependencies=[Depends(get_current_active_superuser_async)])
+async def read_users(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     Retrieve users.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to get the next
+    page; `skip` is only used when no cursor is given.
     """
-    users = crud.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users = await crud.user.get_multi_async(db, skip=skip, limit=limit, cursor=cursor)
+    next_cursor = crud.user.next_cursor(users, limit)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return fast_json(users, serialize_user, headers=headers)
 
 
 @router.post(
     "/",
     response_model=schemas.User,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
 )
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: schemas.UserCreate,
     request: Request,
     response: Response,
@@ -42,16 +57,19 @@ def create_user(
     """
     Create new user.
     """
-    user = crud.user.get_by_email(db, email=user_in.email)
+    user = await crud.user.get_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user = crud.user.create(db, obj_in=user_in)
+    user = await crud.user.create_async(db, obj_in=user_in)
     if settings.EMAILS_ENABLED and user_in.email:
-        send_new_account_email(
-            email_to=user_in.email, username=user_in.email, password=user_in.password
+        # Sent by a worker, a slow mail server doesn't hold the response
+        await run_in_threadpool(
+            send_task,
+            "app.worker.send_new_account_email",
+            kwargs={"email_to": user_in.email, "username": user_in.email},
         )
     response.headers["Location"] = request.url_for("read_user_by_id", user_id=user.id)
     return user
@@ -81,20 +99,37 @@ def update_user_me(
     return user
 
 
-@router.get("/me", response_model=schemas.User)
-def read_user_me(
-    current_user: models.User = Depends(get_current_active_user),
+@router.get(
+    "/me", response_model=schemas.User, responses={304: {"description": "Not Modified"}}
+)
+async def read_user_me(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None),
+    current_user: models.User = Depends(get_current_active_user_async),
 ) -> Any:
     """
     Get current user.
+
+    Answers 304 when `If-None-Match` has the user's current `ETag`.
     """
+    # current_user may come from a worker's token cache, older than the row
+    current = await crud.user.get_version_async(db, id=current_user.id)
+    if current is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    current_etag = etag(schemas.User, current_user.id, current["version"])
+    if etag_matches(if_none_match, current_etag):
+        return not_modified(current_etag)
+    if current["version"] != current_user.version:
+        await db.refresh(current_user)
+    response.headers["ETag"] = etag(schemas.User, current_user.id, current_user.version)
     return current_user
 
 
 @router.post("/open", response_model=schemas.User)
-def create_user_open(
+async def create_user_open(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     password: str = Body(...),
     email: EmailStr = Body(...),
     full_name: str = Body(None),
@@ -107,71 +142,71 @@ def create_user_open(
             status_code=403,
             detail="Open user registration is forbidden on this server",
         )
-    user = crud.user.get_by_email(db, email=email)
+    user = await crud.user.get_by_email_async(db, email=email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system",
         )
     user_in = schemas.UserCreate(password=password, email=email, full_name=full_name)
-    user = crud.user.create(db, obj_in=user_in)
+    user = await crud.user.create_async(db, obj_in=user_in)
     return user
 
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
-    current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = crud.user.get(db, id=user_id)
-    if user == current_user:
-        return user
+    if user_id == current_user.id:
+        return current_user
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
+    user = await crud.user.get_async(db, id=user_id)
     return user
 
 
-@router.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(get_current_active_superuser)])
-def update_user(
+@router.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(get_current_active_superuser_async)])
+async def update_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int,
     user_in: schemas.UserUpdate,
 ) -> Any:
     """
     Update a user.
     """
-    user = crud.user.get(db, id=user_id)
+    user = await crud.user.get_async(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="The user with this username does not exist in the system",
         )
-    user = crud.user.update(db, db_obj=user, obj_in=user_in)
+    user = await crud.user.update_async(db, db_obj=user, obj_in=user_in)
     return user
 
 
 @router.delete(
     "/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser_async)],
 )
-def delete_user(
+async def delete_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_id: int,
 ) -> Any:
     """
     Delete a user.
     """
-    user = crud.user.get(db, id=user_id)
+    user = await crud.user.get_async(db, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user = crud.user.remove(db, id=user_id)
+    user = await crud.user.remove_async(db, id=user_id)
     return user
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Dict
 
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
@@ -6,7 +6,10 @@ from sqlalchemy.orm import Session
 
 from app import models, schemas
 from app import dependencies as deps
-from app.core.celery_app import celery_app
+from app.core.celery_app import send_task
+from app.core.security import basic_auth_cache, token_cache
+from app.crud.cache import cache_backend
+from app.db.session import pool_telemetry
 from app.dependencies import get_db
 from app.utils import send_test_email
 
@@ -21,7 +24,7 @@ def test_celery(
     """
     Test Celery worker.
     """
-    celery_app.send_task("app.worker.test_celery", args=[msg.msg])
+    send_task("app.worker.test_celery", args=[msg.msg])
     return {"msg": "Word received"}
 
 
@@ -37,6 +40,29 @@ def test_email(
     return {"msg": "Test email sent"}
 
 
+@router.get("/db-pool/", response_model=Dict[str, Dict[str, Any]])
+def db_pool(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool sizing, checkout wait times and saturation of this worker.
+    """
+    return pool_telemetry()
+
+
+@router.get("/cache/", response_model=Dict[str, Dict[str, Any]])
+def cache_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Hit ratio and evictions of the caches, as seen by this worker.
+    """
+    stats = {"token": token_cache.stats(), "basic_auth": basic_auth_cache.stats()}
+    if cache_backend is not None:
+        stats["crud"] = cache_backend.stats()
+    return stats
+
+
 def health_check(db: Session = Depends(get_db)):
     try:
         db.execute("select 1")
@@ -1,9 +1,8 @@
 import typer
-from pydantic import ValidationError
 
 from app import crud
+from app.core.password_policy import password_policy
 from app.db.session import SessionLocal
-from app.schemas import UserUpdate
 
 app = typer.Typer(help="CLI user manager.")
 
@@ -21,10 +20,9 @@ def createsuperuser(
 
 
 def password_callback(ctx: typer.Context, value: str):
-    try:
-        UserUpdate(password=value)
-    except ValidationError as e:
-        raise typer.BadParameter('\n'.join([error['msg'] for error in e.errors()]))
+    errors = password_policy.validate(value)
+    if errors:
+        raise typer.BadParameter('\n'.join(errors))
     return value
 
 
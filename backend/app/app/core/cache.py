@@ -0,0 +1,215 @@
+import logging
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Protocol, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """
+    What a cache needs to be used for CRUD reads, see `build_backend`.
+    """
+
+    def get(self, key: str, default: Any = None) -> Any:
+        ...
+
+    def set(self, key: str, value: Any, *, ttl: Optional[float] = None) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire after a TTL.
+
+    Entries can be tagged (e.g. with a user id) so that every entry derived
+    from the same object can be dropped at once with `invalidate_tag`.
+    The cache lives in the memory of a single worker process: invalidation
+    does not reach other workers, so `ttl` bounds how stale they can get.
+    """
+
+    def __init__(self, *, maxsize: int = 1024, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, Optional[Hashable]]]" = (
+            OrderedDict()
+        )
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value, _ = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        ttl: Optional[float] = None,
+        tag: Optional[Hashable] = None,
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + ttl, value, tag)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        tag = entry[2]
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """
+    Cache kept in a Redis server, shared by every worker and host.
+
+    `client` is a `redis.Redis` or anything with the same `get`, `set`,
+    `delete` and `info` methods. Values are pickled. The cache fails open:
+    when Redis can't be reached, reads miss and writes are dropped.
+    """
+
+    def __init__(self, client: Any, *, ttl: float = 60, prefix: str = "") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            data = self.client.get(self.prefix + key)
+        except Exception:
+            self._error("get")
+            return default
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Any, *, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.client.set(self.prefix + key, data, px=math.ceil(ttl * 1000))
+        except Exception:
+            self._error("set")
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception:
+            # A missed invalidation is bounded by the ttl, like a stale worker cache
+            self._error("delete")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            evictions = self.client.info("stats").get("evicted_keys", 0)
+        except Exception:
+            evictions = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _error(self, operation: str) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning("Redis cache %s failed", operation, exc_info=True)
+
+
+def build_backend(
+    name: str, *, maxsize: int, ttl: float, url: Optional[str] = None, prefix: str = ""
+) -> Optional[CacheBackend]:
+    """
+    Cache backend named by a setting: "memory" for a `TTLCache` in each
+    worker, "redis" for a `RedisCache` at `url`, or "" for no cache.
+    """
+    if not name:
+        return None
+    if name == "memory":
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if name == "redis":
+        import redis
+
+        if not url:
+            raise ValueError("The redis cache backend needs a URL")
+        return RedisCache(redis.Redis.from_url(url), ttl=ttl, prefix=prefix)
+    raise ValueError(f"Unknown cache backend: {name}")
@@ -1,5 +1,45 @@
-from celery import Celery
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
-celery_app = Celery("worker", broker="amqp://guest@queue//")
+from app.core.config import settings
 
-celery_app.conf.task_routes = {"app.worker.test_celery": "main-queue"}
+if TYPE_CHECKING:
+    from celery import Celery
+    from celery.result import AsyncResult
+
+
+@lru_cache()
+def get_celery_app() -> "Celery":
+    # Imported on first use: the API only sends a task now and then, and
+    # celery and kombu are slow to import in every app process
+    from celery import Celery
+
+    celery_app = Celery(
+        "worker", broker=settings.AMQP_URI, backend=settings.CELERY_RESULT_BACKEND
+    )
+    celery_app.conf.update(
+        task_routes={"app.worker.*": "main-queue"},
+        task_acks_late=settings.CELERY_TASK_ACKS_LATE,
+        worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+        worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+        result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
+        # Run by the worker's embedded beat, see worker-start.sh
+        beat_schedule={
+            "purge-item-ingest-batches": {
+                "task": "app.worker.purge_item_ingest_batches",
+                "schedule": 3600.0,
+            },
+        },
+    )
+    return celery_app
+
+
+def send_task(name: str, *args: Any, **kwargs: Any) -> "AsyncResult":
+    return get_celery_app().send_task(name, *args, **kwargs)
+
+
+def __getattr__(name: str) -> Any:
+    # `from app.core.celery_app import celery_app`, for the worker
+    if name == "celery_app":
+        return get_celery_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,124 @@
+"""
+Compact on-disk index of common passwords.
+
+The index is a sorted, fixed-width file: a small header followed by
+`count` records of `width` bytes, each one a lower-cased UTF-8 password
+padded with NUL bytes. Workers `mmap` it, so the pages are shared through
+the OS page cache by every gunicorn process, and look up a password with a
+binary search over the records.
+
+Build it once (e.g. in the Docker image) with:
+
+    python -m app.core.common_passwords app/schemas/common-passwords.txt.gz \
+        app/schemas/common-passwords.idx
+"""
+import gzip
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, Set, Union
+
+MAGIC = b"PWIDX1\0\0"
+HEADER = struct.Struct("<8sII")
+
+
+def read_password_list(path: Union[str, Path]) -> Iterator[str]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    for line in lines:
+        password = line.strip().lower()
+        if password:
+            yield password
+
+
+def build_index(passwords: Iterable[str], target: Union[str, Path]) -> Path:
+    """
+    Write `passwords` to `target` as a sorted fixed-width index.
+
+    The file is written next to `target` and renamed into place, so readers
+    never see a partially written index.
+    """
+    target = Path(target)
+    records = sorted({password.encode("utf-8") for password in passwords})
+    width = max((len(record) for record in records), default=1)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, width, len(records)))
+            for record in records:
+                f.write(record.ljust(width, b"\0"))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return target
+
+
+class CommonPasswordIndex:
+    """
+    Read-only view over an index built by `build_index`.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.count = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or len(self._mm) != HEADER.size + self.width * self.count:
+            self._mm.close()
+            raise ValueError(f"{path} is not a common password index")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, password: object) -> bool:
+        if not isinstance(password, str):
+            return False
+        key = password.encode("utf-8")
+        if not key or len(key) > self.width:
+            return False
+        key = key.ljust(self.width, b"\0")
+        mm, width, offset = self._mm, self.width, HEADER.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = offset + mid * width
+            record = mm[start : start + width]
+            if record < key:
+                lo = mid + 1
+            elif record > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+
+def load_index(
+    path: Union[str, Path], *, source: Union[str, Path]
+) -> Union[CommonPasswordIndex, Set[str]]:
+    """
+    Open the index at `path`, building it from `source` first if it is missing.
+
+    Falls back to an in-memory set when the index can't be written or read,
+    so validation keeps working on read-only deployments.
+    """
+    try:
+        if not Path(path).exists():
+            build_index(read_password_list(source), path)
+        return CommonPasswordIndex(path)
+    except (OSError, ValueError):
+        return set(read_password_list(source))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"usage: {sys.argv[0]} SOURCE TARGET")
+    index_path = build_index(read_password_list(sys.argv[1]), sys.argv[2])
+    print(f"wrote {len(CommonPasswordIndex(index_path))} passwords to {index_path}")
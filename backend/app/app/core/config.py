@@ -10,6 +10,22 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Verified access tokens are cached per worker to skip decoding them and
+    # loading the whole user; the user's flags are still read every request
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 1024
+    # HTTP Basic credentials that passed bcrypt are remembered for a short while
+    BASIC_AUTH_CACHE_TTL_SECONDS: int = 30
+    BASIC_AUTH_CACHE_MAX_SIZE: int = 1024
+    # bcrypt runs in a per-worker process pool, 0 workers runs it inline
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Largest number of rows accepted by one bulk request
+    BULK_MAX_ITEMS: int = 1000
+    # Rows fetched per round-trip from the server-side cursor of an export
+    EXPORT_BATCH_SIZE: int = 1000
+    # Largest page of item search results
+    SEARCH_MAX_LIMIT: int = 100
     SERVER_NAME: str
     SERVER_HOST: AnyHttpUrl
     # BACKEND_CORS_ORIGINS is a JSON-formatted list of origins
@@ -52,11 +68,74 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    # Connections the whole service may open: split between workers and engines
+    DB_POOL_BUDGET: int = 60
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # Number of gunicorn workers, exported by gunicorn_conf.py
+    WEB_CONCURRENCY: int = 1
+    # Statements slower than this are logged, with their parameters redacted
+    SLOW_QUERY_SECONDS: float = 0.5
+    # A statement repeated this many times in one request is logged as an N+1
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # Add X-DB-Queries and X-DB-Time headers to every response
+    DB_DEBUG_HEADERS: bool = False
+
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str):
+            return v
+        sync_uri = str(values.get("SQLALCHEMY_DATABASE_URI") or "")
+        return sync_uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Read replicas of the database, SELECTs are spread over them round-robin
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    SQLALCHEMY_ASYNC_REPLICA_URIS: List[str] = []
+
+    @validator("SQLALCHEMY_ASYNC_REPLICA_URIS", pre=True)
+    def assemble_async_replica_uris(cls, v: Optional[List[str]], values: Dict[str, Any]) -> Any:
+        if v:
+            return v
+        return [
+            uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+            for uri in values.get("SQLALCHEMY_REPLICA_URIS") or []
+        ]
+
+    # Read-through cache of CRUD gets by id: "redis", "memory" or "" (off). A
+    # "memory" cache is per worker and only invalidated by that worker's
+    # writes, so it is refused with more than one gunicorn worker
+    CRUD_CACHE_BACKEND: str = ""
+
+    @validator("CRUD_CACHE_BACKEND")
+    def check_crud_cache_backend(cls, v: str, values: Dict[str, Any]) -> str:
+        if v == "memory" and values.get("WEB_CONCURRENCY", 1) > 1:
+            raise ValueError(
+                "the memory CRUD cache would serve stale rows with several workers,"
+                " use redis"
+            )
+        return v
+
+    CRUD_CACHE_MAX_SIZE: int = 4096
+    # Seconds an object stays cached, per table; other tables aren't cached
+    CRUD_CACHE_TTL_SECONDS: Dict[str, int] = {"user": 30, "item": 30}
+    REDIS_URL: Optional[str] = None
+
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
     SMTP_HOST: Optional[str] = None
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_TIMEOUT_SECONDS: int = 10
+    # Idle SMTP connections kept open by each worker process between sends
+    SMTP_POOL_SIZE: int = 2
+    # Servers cap the messages sent per connection, it's reopened after that many
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    # Email tasks retry network errors and 4xx replies with exponential backoff
+    EMAIL_MAX_RETRIES: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: int = 2
+    EMAIL_RETRY_BACKOFF_MAX_SECONDS: int = 600
     EMAILS_FROM_EMAIL: Optional[EmailStr] = None
     EMAILS_FROM_NAME: Optional[str] = None
 
@@ -68,6 +147,8 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
     EMAIL_TEMPLATES_DIR: str = "/app/app/email-templates/build"
+    # Recompile email templates whose file changed, for development
+    EMAIL_TEMPLATES_AUTO_RELOAD: bool = False
     EMAILS_ENABLED: bool = False
 
     @validator("EMAILS_ENABLED", pre=True)
@@ -83,7 +164,17 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
     USERS_OPEN_REGISTRATION: bool = False
     PASSWORD_MIN_LENGTH = 8
+    PASSWORD_MAX_SIMILARITY = 0.7
+    # Password rules, applied in this order: keep the cheap ones first
+    PASSWORD_VALIDATORS: List[str] = [
+        "minimum_length",
+        "numeric",
+        "common",
+        "user_attribute_similarity",
+    ]
     DEFAULT_PASSWORD_LIST_PATH = Path(__file__).resolve().parent.parent / 'schemas' / 'common-passwords.txt.gz'
+    # Built from DEFAULT_PASSWORD_LIST_PATH by `python -m app.core.common_passwords`
+    COMMON_PASSWORD_INDEX_PATH = Path(__file__).resolve().parent.parent / 'schemas' / 'common-passwords.idx'
 
     RABBITMQ_HOST: str
     RABBITMQ_PORT: str
@@ -103,6 +194,27 @@ class Settings(BaseSettings):
             port=values.get("RABBITMQ_PORT"),
         )
 
+    # Nameko RPC clients kept connected by each app process, see app/rpc.py
+    RPC_POOL_SIZE: int = 4
+    # Default timeout of an RPC call, waiting for a free client included
+    RPC_TIMEOUT_SECONDS: float = 10
+
+    # Celery, see app/core/celery_app.py. Tasks reserved ahead by each worker
+    # process: 1 spreads long tasks over idle workers instead of hoarding them
+    CELERY_PREFETCH_MULTIPLIER: int = 1
+    # Worker processes; None is one per CPU
+    CELERY_WORKER_CONCURRENCY: Optional[int] = None
+    # Acknowledge a task once it ran, so the tasks of a crashed worker are redelivered
+    CELERY_TASK_ACKS_LATE: bool = True
+    # e.g. "redis://redis:6379/1"; without one, task results aren't stored
+    CELERY_RESULT_BACKEND: Optional[str] = None
+    CELERY_RESULT_EXPIRES_SECONDS: int = 3600
+    # Rows inserted by each item ingest task, in one transaction
+    ITEM_INGEST_BATCH_SIZE: int = 1000
+    # Ingested batches are remembered this long to skip redeliveries of their
+    # task, well past its retries and the broker's redelivery of unacked tasks
+    ITEM_INGEST_BATCH_RETENTION_HOURS: int = 24
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,48 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import jinja2
+
+
+class TemplateRegistry:
+    """
+    The email templates of `directory`, each read and compiled once and then
+    rendered from memory.
+
+    With `auto_reload`, meant for development, a template whose file was
+    modified since it was compiled is compiled again on its next use.
+    """
+
+    def __init__(self, directory: str, *, auto_reload: bool = False) -> None:
+        # Imported here rather than by every app process, most never send an email
+        import jinja2
+
+        self.environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            # Keep every template, there are only a few
+            cache_size=-1,
+        )
+
+    def get(self, name: str) -> "jinja2.Template":
+        return self.environment.get_template(name)
+
+    def render(self, name: str, /, **context: Any) -> str:
+        return self.get(name).render(**context)
+
+    def preload(self) -> None:
+        """
+        Compile every template now rather than on first use.
+        """
+        for name in self.environment.list_templates():
+            self.get(name)
+
+
+@lru_cache()
+def template_registry() -> TemplateRegistry:
+    return TemplateRegistry(
+        settings.EMAIL_TEMPLATES_DIR, auto_reload=settings.EMAIL_TEMPLATES_AUTO_RELOAD
+    )
@@ -0,0 +1,135 @@
+import logging
+import queue
+import random
+import smtplib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import emails
+    from emails.backend.smtp import SMTPBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Long-lived SMTP connections, reused across sends.
+
+    Opening a connection (TCP, EHLO, STARTTLS, AUTH) costs more round trips
+    than sending a message on it, so connections are kept open between sends:
+    at most `size` idle ones are kept, and each is closed after
+    `max_messages`, the usual cap of servers. A connection that failed is
+    closed rather than reused.
+    """
+
+    def __init__(
+        self, options: Dict[str, Any], *, size: int, max_messages: int
+    ) -> None:
+        self.options = options
+        self.size = size
+        self.max_messages = max_messages
+        # Most recently used first, so spare connections time out server-side
+        self._idle: "queue.LifoQueue[Tuple[SMTPBackend, int]]" = queue.LifoQueue()
+
+    def send(self, message: "emails.Message") -> None:
+        (error,) = self.send_many([message])
+        if error is not None:
+            raise error
+
+    def send_many(self, messages: Sequence["emails.Message"]) -> List[Optional[Exception]]:
+        """
+        Send `messages`, rendered and addressed, over one connection and
+        return the error of each, None when it was sent.
+        """
+        errors: List[Optional[Exception]] = []
+        backend, sent = self._acquire()
+        for message in messages:
+            if sent >= self.max_messages:
+                backend.close()
+                backend, sent = self._connect(), 0
+            try:
+                message.send(smtp=backend)
+            except Exception as e:
+                logger.warning("Sending email to %s failed: %r", message.mail_to, e)
+                errors.append(e)
+                backend.close()
+                backend, sent = self._connect(), 0
+            else:
+                errors.append(None)
+                sent += 1
+        self._release(backend, sent)
+        return errors
+
+    def close(self) -> None:
+        while True:
+            try:
+                backend, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            backend.close()
+
+    def _connect(self) -> "SMTPBackend":
+        # emails is only imported by the processes that send some
+        from emails.backend.smtp import SMTPBackend
+
+        # Connects on first use
+        return SMTPBackend(fail_silently=False, **self.options)
+
+    def _acquire(self) -> Tuple["SMTPBackend", int]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect(), 0
+
+    def _release(self, backend: "SMTPBackend", sent: int) -> None:
+        if self._idle.qsize() >= self.size:
+            backend.close()
+        else:
+            self._idle.put((backend, sent))
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether sending may succeed later: network errors and 4xx replies.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+def retry_countdown(retries: int) -> float:
+    """
+    Seconds before retry number `retries + 1`: exponential, capped and
+    jittered so that messages failed together aren't retried together.
+    """
+    backoff = min(
+        settings.EMAIL_RETRY_BACKOFF_SECONDS * 2 ** retries,
+        settings.EMAIL_RETRY_BACKOFF_MAX_SECONDS,
+    )
+    return random.uniform(backoff / 2, backoff)
+
+
+@lru_cache()
+def smtp_pool() -> SMTPPool:
+    # Created on first use, so worker processes don't share the sockets of their parent
+    options: Dict[str, Any] = {
+        "host": settings.SMTP_HOST,
+        "port": settings.SMTP_PORT,
+        "timeout": settings.SMTP_TIMEOUT_SECONDS,
+    }
+    if settings.SMTP_TLS:
+        options["tls"] = True
+    if settings.SMTP_USER:
+        options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        options["password"] = settings.SMTP_PASSWORD
+    return SMTPPool(
+        options,
+        size=settings.SMTP_POOL_SIZE,
+        max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    )
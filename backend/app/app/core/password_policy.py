@@ -0,0 +1,147 @@
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from app.core.common_passwords import load_index
+from app.core.config import settings
+
+# A rule returns an error message for an invalid password, or None
+Rule = Callable[[str, Mapping[str, Any]], Optional[str]]
+
+WORD_SPLIT_RE = re.compile(r"\W+")
+
+
+def minimum_length(min_length: int) -> Rule:
+    def rule(password: str, user_attributes: Mapping[str, Any]) -> Optional[str]:
+        if len(password) < min_length:
+            return (
+                f"This password is too short. It must contain at least {min_length} characters."
+            )
+        return None
+
+    return rule
+
+
+def numeric() -> Rule:
+    def rule(password: str, user_attributes: Mapping[str, Any]) -> Optional[str]:
+        if password.isdigit():
+            return "This password is entirely numeric."
+        return None
+
+    return rule
+
+
+def common(passwords: Callable[[], Container[str]]) -> Rule:
+    def rule(password: str, user_attributes: Mapping[str, Any]) -> Optional[str]:
+        if password.lower().strip() in passwords():
+            return "This password is too common."
+        return None
+
+    return rule
+
+
+def user_attribute_similarity(max_similarity: float) -> Rule:
+    def rule(password: str, user_attributes: Mapping[str, Any]) -> Optional[str]:
+        password = password.lower()
+        matcher = SequenceMatcher(b=password)
+        for attribute_name, value in user_attributes.items():
+            if not value or not isinstance(value, str):
+                continue
+            for value_part in WORD_SPLIT_RE.split(value) + [value]:
+                matcher.set_seq1(value_part.lower())
+                # real_quick_ratio() is a cheap upper bound of quick_ratio()
+                if (
+                    matcher.real_quick_ratio() >= max_similarity
+                    and matcher.quick_ratio() >= max_similarity
+                ):
+                    return f"The password is too similar to the {attribute_name}."
+        return None
+
+    return rule
+
+
+class PasswordPolicy:
+    """
+    Ordered set of password rules.
+
+    Rules run in the given order, which should be cheapest first, and
+    validation stops at the first failing rule unless `all_errors` is set.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Rule]]) -> None:
+        self.rules = list(rules)
+
+    def validate(
+        self,
+        password: str,
+        user_attributes: Optional[Mapping[str, Any]] = None,
+        *,
+        all_errors: bool = False,
+    ) -> List[str]:
+        user_attributes = user_attributes or {}
+        errors = []
+        for _, rule in self.rules:
+            error = rule(password, user_attributes)
+            if error is not None:
+                errors.append(error)
+                if not all_errors:
+                    break
+        return errors
+
+    def validate_many(
+        self, passwords: Iterable[Tuple[str, Optional[Mapping[str, Any]]]]
+    ) -> List[List[str]]:
+        """
+        Validate `(password, user_attributes)` pairs, e.g. for a bulk import.
+
+        Returns the errors of each pair, in order; an empty list means valid.
+        """
+        return [
+            self.validate(password, user_attributes)
+            for password, user_attributes in passwords
+        ]
+
+    def check(
+        self, password: str, user_attributes: Optional[Mapping[str, Any]] = None
+    ) -> str:
+        """
+        Return `password` if it is valid, raise `ValueError` otherwise.
+        """
+        errors = self.validate(password, user_attributes)
+        if errors:
+            raise ValueError(errors[0])
+        return password
+
+
+@lru_cache()
+def get_common_passwords() -> Container[str]:
+    return load_index(
+        settings.COMMON_PASSWORD_INDEX_PATH, source=settings.DEFAULT_PASSWORD_LIST_PATH
+    )
+
+
+def build_policy(names: Iterable[str]) -> PasswordPolicy:
+    factories: Dict[str, Callable[[], Rule]] = {
+        "minimum_length": lambda: minimum_length(settings.PASSWORD_MIN_LENGTH),
+        "numeric": numeric,
+        "common": lambda: common(get_common_passwords),
+        "user_attribute_similarity": lambda: user_attribute_similarity(
+            settings.PASSWORD_MAX_SIMILARITY
+        ),
+    }
+    return PasswordPolicy([(name, factories[name]()) for name in names])
+
+
+password_policy = build_policy(settings.PASSWORD_VALIDATORS)
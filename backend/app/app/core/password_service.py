@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+
+class PasswordServiceBusy(Exception):
+    """
+    Raised when more password operations are pending than the service accepts.
+    """
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    started = time.time()
+    result = func(*args)
+    return result, started, time.time() - started
+
+
+class PasswordService:
+    """
+    Runs bcrypt hashing and verification in a bounded process pool.
+
+    bcrypt is CPU bound and holds the GIL, so running it in the endpoints'
+    threadpool starves every other route under a login storm. At most
+    `max_pending` operations are queued or running at once; beyond that
+    `PasswordServiceBusy` is raised right away instead of queueing. With
+    `max_workers=0` operations run inline, in the calling thread.
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "calls": 0,
+            "rejected": 0,
+            "pending": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def hash(self, password: str) -> str:
+        return self._submit(get_password_hash, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(verify_password, plain_password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await self._submit_async(get_password_hash, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit_async(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    async def _submit_async(self, func: Callable[..., Any], *args: Any) -> Any:
+        if not self.max_workers:
+            return await run_in_threadpool(self._run_inline, func, *args)
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> "Future[Any]":
+        if not self.max_workers:
+            future: "Future[Any]" = Future()
+            future.set_result(self._run_inline(func, *args))
+            return future
+        self._acquire()
+        submitted = time.time()
+        try:
+            timed = self._get_executor().submit(_timed, func, *args)
+        except BaseException:
+            self._release()
+            raise
+        result: "Future[Any]" = Future()
+
+        def done(timed: "Future[Tuple[Any, float, float]]") -> None:
+            self._release()
+            try:
+                value, started, elapsed = timed.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            self._record(started - submitted, elapsed)
+            result.set_result(value)
+
+        timed.add_done_callback(done)
+        return result
+
+    def _run_inline(self, func: Callable[..., Any], *args: Any) -> Any:
+        self._acquire()
+        try:
+            value, _, elapsed = _timed(func, *args)
+        finally:
+            self._release()
+        self._record(0.0, elapsed)
+        return value
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use, so every gunicorn worker gets its own pool after fork
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordServiceBusy("Too many pending password operations")
+        with self._lock:
+            self._stats["pending"] += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._stats["pending"] -= 1
+        self._slots.release()
+
+    def _record(self, queue_wait: float, elapsed: float) -> None:
+        queue_wait = max(queue_wait, 0.0)
+        with self._lock:
+            stats = self._stats
+            stats["calls"] += 1
+            stats["queue_wait_seconds_total"] += queue_wait
+            stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], queue_wait)
+            stats["hash_seconds_total"] += elapsed
+            stats["hash_seconds_max"] = max(stats["hash_seconds_max"], elapsed)
+
+
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -1,13 +1,26 @@
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Any, Union, List
 
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# token -> (TokenPayload, user column snapshot), tagged with the user id. The
+# snapshot is only used while the user's version in the database matches
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+# credentials_key(...) -> True, tagged with the user id
+basic_auth_cache = TTLCache(
+    maxsize=settings.BASIC_AUTH_CACHE_MAX_SIZE, ttl=settings.BASIC_AUTH_CACHE_TTL_SECONDS
+)
+
 
 ALGORITHM = "HS256"
 
@@ -32,3 +45,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def credentials_key(username: str, password: str, hashed_password: str) -> bytes:
+    """
+    HMAC of a set of credentials, so plain passwords are never kept in memory.
+
+    The stored hash is part of the key: once the password changes, entries
+    made for the old one can't match anymore, even in other workers.
+    """
+    message = b"".join(
+        len(part).to_bytes(4, "big") + part
+        for part in (p.encode("utf-8") for p in (username, password, hashed_password))
+    )
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).digest()
+
+
+def invalidate_user_caches(user_id: int) -> None:
+    token_cache.invalidate_tag(user_id)
+    basic_auth_cache.invalidate_tag(user_id)
@@ -1,15 +1,48 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Column,
+    case,
+    cast,
+    delete,
+    insert,
+    inspect,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Executable
 
+from app.crud.cache import model_cache
+from app.crud.pagination import next_cursor, paginate
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Rows per multi-row statement in the bulk methods, keeps bind parameters bounded
+BULK_CHUNK_SIZE = 1000
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -20,24 +53,65 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         * `model`: A SQLAlchemy model class
         * `schema`: A Pydantic model (schema) class
+
+        Every method has an `*_async` twin taking an `AsyncSession` instead.
+        Lists are ordered by `keyset` and paginated with an opaque `cursor`,
+        or with the legacy `skip` offset when no cursor is given.
+
+        Writes are a single `INSERT/UPDATE/DELETE ... RETURNING` statement,
+        whose row is loaded into the returned instance instead of refreshing it.
+
+        `get` reads through `cache` when one is configured for the model's
+        table; every update and removal, bulk or not, invalidates it.
+
+        Updates bump the `version` column of models that have one.
+
+        Generated columns are left out of `columns`, the ones written and
+        returned: the database computes them and they are loaded on access.
         """
         self.model = model
+        self.keyset: Sequence[Any] = (model.id,)
+        self.columns: Sequence[Column] = [
+            column
+            for column in model.__table__.columns  # type: ignore
+            if column.computed is None
+        ]
+        self.cache = model_cache(model.__table__)  # type: ignore
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        if self.cache is not None:
+            values = self.cache.get(id)
+            if values is not None:
+                return self._load_cached(db, values)
+        db_obj = db.query(self.model).filter(self.model.id == id).first()
+        if db_obj is not None and self.cache is not None:
+            self.cache.set(id, self._snapshot(db_obj))
+        return db_obj
+
+    def get_version(
+        self, db: Session, *, id: Any, columns: Sequence[str] = ()
+    ) -> Optional[Mapping[str, Any]]:
+        table = self.model.__table__  # type: ignore
+        query = select(table.c.version, *(table.c[column] for column in columns))
+        row = db.execute(query.where(table.c.id == id)).first()
+        return row._mapping if row is not None else None
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = db.query(self.model)
+        return paginate(query, self.keyset, skip=skip, limit=limit, cursor=cursor).all()
+
+    def next_cursor(self, rows: Sequence[ModelType], limit: int) -> Optional[str]:
+        return next_cursor(rows, self.keyset, limit)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self._write(db, self._insert(jsonable_encoder(obj_in)))
 
     def update(
         self,
@@ -46,21 +120,316 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        update_data = self._update_values(obj_in)
+        if not update_data:
+            return db_obj
+        return self._write(db, self._update(db_obj, update_data), db_obj=db_obj)
+
+    def remove(self, db: Session, *, id: int) -> ModelType:
+        return self._write(db, self._delete(id), deleted=True)
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        if self.cache is not None:
+            values = self.cache.get(id)
+            if values is not None:
+                return self._load_cached(db.sync_session, values)
+        db_obj = await db.get(self.model, id)
+        if db_obj is not None and self.cache is not None:
+            self.cache.set(id, self._snapshot(db_obj))
+        return db_obj
+
+    async def get_version_async(
+        self, db: AsyncSession, *, id: Any, columns: Sequence[str] = ()
+    ) -> Optional[Mapping[str, Any]]:
+        """
+        The `version` of row `id`, and its `columns`, without loading the whole
+        row: enough to answer a conditional request. None if there is no such row.
+
+        Always read from the database, never from `cache`: a stale version
+        would answer 304 for a row that changed.
+        """
+        table = self.model.__table__  # type: ignore
+        query = select(table.c.version, *(table.c[column] for column in columns))
+        result = await db.execute(query.where(table.c.id == id))
+        row = result.first()
+        return row._mapping if row is not None else None
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[ModelType]:
+        query = select(self.model)
+        result = await db.execute(
+            paginate(query, self.keyset, skip=skip, limit=limit, cursor=cursor)
+        )
+        return result.scalars().all()
+
+    async def create_async(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> ModelType:
+        return await self._write_async(db, self._insert(jsonable_encoder(obj_in)))
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        update_data = self._update_values(obj_in)
+        if not update_data:
+            return db_obj
+        return await self._write_async(
+            db, self._update(db_obj, update_data), db_obj=db_obj
+        )
+
+    async def remove_async(self, db: AsyncSession, *, id: int) -> ModelType:
+        return await self._write_async(db, self._delete(id), deleted=True)
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        values: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Insert `objs_in` with multi-row `INSERT ... RETURNING` statements in a
+        single transaction. `values` are set on every row (e.g. an owner).
+
+        The bulk methods return the written rows as result rows rather than
+        ORM instances: they have the same attributes but skip the session.
+        """
+        rows = [
+            row for stmt in self._insert_many(objs_in, values) for row in db.execute(stmt)
+        ]
+        db.commit()
+        return rows
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Mapping[int, Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> List[Any]:
+        """
+        Update the rows whose ids are the keys of `objs_in`, in one transaction.
+        Ids that don't exist are ignored and missing from the result.
+        """
+        rows = [row for stmt in self._update_many(objs_in) for row in db.execute(stmt)]
+        db.commit()
+        self._invalidate(row.id for row in rows)
+        return rows
+
+    def remove_many(self, db: Session, *, ids: Sequence[int]) -> List[Any]:
+        rows = [row for stmt in self._delete_many(ids) for row in db.execute(stmt)]
+        db.commit()
+        self._invalidate(row.id for row in rows)
+        return rows
+
+    async def create_many_async(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        values: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        rows = []
+        for stmt in self._insert_many(objs_in, values):
+            rows.extend(await db.execute(stmt))
+        await db.commit()
+        return rows
+
+    async def update_many_async(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Mapping[int, Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> List[Any]:
+        rows = []
+        for stmt in self._update_many(objs_in):
+            rows.extend(await db.execute(stmt))
+        await db.commit()
+        self._invalidate(row.id for row in rows)
+        return rows
+
+    async def remove_many_async(self, db: AsyncSession, *, ids: Sequence[int]) -> List[Any]:
+        rows = []
+        for stmt in self._delete_many(ids):
+            rows.extend(await db.execute(stmt))
+        await db.commit()
+        self._invalidate(row.id for row in rows)
+        return rows
+
+    def _insert_many(
+        self, objs_in: Sequence[CreateSchemaType], values: Optional[Dict[str, Any]]
+    ) -> Iterator[Executable]:
+        table = self.model.__table__  # type: ignore
+        rows = [{**jsonable_encoder(obj_in), **(values or {})} for obj_in in objs_in]
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start : start + BULK_CHUNK_SIZE]
+            yield insert(table).values(chunk).returning(*self.columns)
+
+    def _update_many(
+        self, objs_in: Mapping[int, Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> Iterator[Executable]:
+        table = self.model.__table__  # type: ignore
+        columns = {column.key for column in self.columns} - {"id"}
+        # Rows updating the same set of columns share one UPDATE with a CASE per column
+        groups: Dict[tuple, Dict[int, Dict[str, Any]]] = {}
+        for id, obj_in in objs_in.items():
+            if isinstance(obj_in, dict):
+                update_data = obj_in
+            else:
+                update_data = obj_in.dict(exclude_unset=True)
+            update_data = {k: v for k, v in update_data.items() if k in columns}
+            groups.setdefault(tuple(sorted(update_data)), {})[id] = update_data
+        for fields, rows in groups.items():
+            ids = list(rows)
+            for start in range(0, len(ids), BULK_CHUNK_SIZE):
+                chunk = ids[start : start + BULK_CHUNK_SIZE]
+                if not fields:
+                    yield select(*self.columns).where(table.c.id.in_(chunk))
+                    continue
+                yield (
+                    update(table)
+                    .where(table.c.id.in_(chunk))
+                    .values(
+                        self._bump_version(
+                            {
+                                field: case(
+                                    {
+                                        id: cast(
+                                            literal(rows[id][field], table.c[field].type),
+                                            table.c[field].type,
+                                        )
+                                        for id in chunk
+                                    },
+                                    value=table.c.id,
+                                )
+                                for field in fields
+                            }
+                        )
+                    )
+                    .returning(*self.columns)
+                )
+
+    def _delete_many(self, ids: Sequence[int]) -> Iterator[Executable]:
+        table = self.model.__table__  # type: ignore
+        ids = list(ids)
+        for start in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[start : start + BULK_CHUNK_SIZE]
+            yield delete(table).where(table.c.id.in_(chunk)).returning(*self.columns)
+
+    def _insert(self, values: Dict[str, Any]) -> Executable:
+        table = self.model.__table__  # type: ignore
+        return insert(table).values(values).returning(*self.columns)
+
+    def _update(self, db_obj: ModelType, values: Dict[str, Any]) -> Executable:
+        table = self.model.__table__  # type: ignore
+        # The identity is known even when db_obj is expired, reading .id could SELECT it
+        (id,) = inspect(db_obj).identity
+        return (
+            update(table)
+            .where(table.c.id == id)
+            .values(self._bump_version(values))
+            .returning(*self.columns)
+        )
+
+    def _delete(self, id: int) -> Executable:
+        table = self.model.__table__  # type: ignore
+        return delete(table).where(table.c.id == id).returning(*self.columns)
+
+    def _write(
+        self,
+        db: Session,
+        stmt: Executable,
+        *,
+        db_obj: Optional[ModelType] = None,
+        deleted: bool = False
+    ) -> ModelType:
+        row = db.execute(stmt).one()
+        db.commit()
+        if db_obj is not None or deleted:
+            self._invalidate([row.id])
+        return self._load_row(db, row._asdict(), db_obj=db_obj, deleted=deleted)
+
+    async def _write_async(
+        self,
+        db: AsyncSession,
+        stmt: Executable,
+        *,
+        db_obj: Optional[ModelType] = None,
+        deleted: bool = False
+    ) -> ModelType:
+        row = (await db.execute(stmt)).one()
+        await db.commit()
+        if db_obj is not None or deleted:
+            self._invalidate([row.id])
+        return self._load_row(
+            db.sync_session, row._asdict(), db_obj=db_obj, deleted=deleted
+        )
+
+    def _load_row(
+        self,
+        db: Session,
+        values: Mapping[str, Any],
+        *,
+        db_obj: Optional[ModelType] = None,
+        deleted: bool = False
+    ) -> ModelType:
+        """
+        Set the column `values` of a row, e.g. returned by a write, as the
+        committed state of `db_obj`, of the session's instance of that row, or
+        of a new instance added to the session. Deleted rows are detached from it.
+        """
+        if db_obj is None:
+            db_obj = db.identity_map.get(identity_key(self.model, values["id"]))
+        is_new = db_obj is None
+        if db_obj is None:
+            db_obj = self.model()
+        for key, value in values.items():
+            set_committed_value(db_obj, key, value)
+        if is_new:
+            make_transient_to_detached(db_obj)
+            if not deleted:
+                db.add(db_obj)
+        elif deleted and db_obj in db:
+            db.expunge(db_obj)
+        return db_obj
+
+    def _bump_version(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        table = self.model.__table__  # type: ignore
+        if "version" not in table.c:
+            return values
+        return {**values, "version": table.c.version + 1}
+
+    def _load_cached(self, db: Session, values: Mapping[str, Any]) -> ModelType:
+        db_obj = db.identity_map.get(identity_key(self.model, values["id"]))
+        # A loaded or modified instance in the session is at least as recent
+        if db_obj is not None:
+            state = inspect(db_obj)
+            if state.modified or not state.expired_attributes:
+                return db_obj
+        return self._load_row(db, values, db_obj=db_obj)
+
+    def _snapshot(self, db_obj: ModelType) -> Dict[str, Any]:
+        return {column.key: getattr(db_obj, column.key) for column in self.columns}
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        if self.cache is not None:
+            self.cache.delete_many(ids)
+
+    def _update_values(
+        self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Dict[str, Any]:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
-        return obj
+        columns = {column.key for column in self.columns}
+        return {field: value for field, value in update_data.items() if field in columns}
@@ -0,0 +1,59 @@
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Table
+
+from app.core.cache import CacheBackend, build_backend
+from app.core.config import settings
+
+
+def table_version(table: Table) -> str:
+    """
+    Short hash of the columns of `table`, part of every cache key so that
+    entries cached by code with another version of the table are never read.
+    """
+    columns = ",".join(f"{column.name}:{column.type}" for column in table.columns)
+    return hashlib.sha1(columns.encode("utf-8")).hexdigest()[:8]
+
+
+class ModelCache:
+    """
+    Column values of one table's rows, by primary key.
+
+    Entries are dropped on every write going through CRUDBase, and expire
+    after `ttl` seconds, which bounds how stale the other workers' in-process
+    caches and writes made outside CRUDBase can get.
+    """
+
+    def __init__(self, backend: CacheBackend, table: Table, *, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = f"crud:{table.name}:{table_version(table)}:"
+
+    def get(self, id: Any) -> Optional[Dict[str, Any]]:
+        return self.backend.get(self.prefix + str(id))
+
+    def set(self, id: Any, values: Dict[str, Any]) -> None:
+        self.backend.set(self.prefix + str(id), values, ttl=self.ttl)
+
+    def delete(self, id: Any) -> None:
+        self.backend.delete(self.prefix + str(id))
+
+    def delete_many(self, ids: Iterable[Any]) -> None:
+        for id in ids:
+            self.delete(id)
+
+
+def model_cache(table: Table) -> Optional[ModelCache]:
+    ttl = settings.CRUD_CACHE_TTL_SECONDS.get(table.name)
+    if cache_backend is None or not ttl:
+        return None
+    return ModelCache(cache_backend, table, ttl=ttl)
+
+
+cache_backend = build_backend(
+    settings.CRUD_CACHE_BACKEND,
+    maxsize=settings.CRUD_CACHE_MAX_SIZE,
+    ttl=max(settings.CRUD_CACHE_TTL_SECONDS.values(), default=0),
+    url=settings.REDIS_URL,
+)
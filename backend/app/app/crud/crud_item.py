@@ -1,10 +1,17 @@
-from typing import List
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, cast, delete, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from app.crud.base import CRUDBase
-from app.models.item import Item
+from app.crud.pagination import decode_cursor, encode_cursor, paginate
+from app.models.item import SEARCH_CONFIG, Item
+from app.models.item_ingest_batch import ItemIngestBatch
 from app.schemas.item import ItemCreate, ItemUpdate
 
 
@@ -13,22 +20,194 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
         self, db: Session, *, obj_in: ItemCreate, owner_id: int
     ) -> Item:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self._write(db, self._insert({**obj_in_data, "owner_id": owner_id}))
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Item]:
+        query = db.query(self.model).filter(Item.owner_id == owner_id)
+        return paginate(query, self.keyset, skip=skip, limit=limit, cursor=cursor).all()
+
+    async def create_with_owner_async(
+        self, db: AsyncSession, *, obj_in: ItemCreate, owner_id: int
+    ) -> Item:
+        obj_in_data = jsonable_encoder(obj_in)
+        return await self._write_async(
+            db, self._insert({**obj_in_data, "owner_id": owner_id})
+        )
+
+    async def get_multi_by_owner_async(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Item]:
-        return (
-            db.query(self.model)
-            .filter(Item.owner_id == owner_id)
-            .offset(skip)
+        query = select(self.model).filter(Item.owner_id == owner_id)
+        result = await db.execute(
+            paginate(query, self.keyset, skip=skip, limit=limit, cursor=cursor)
+        )
+        return result.scalars().all()
+
+    async def stream_async(
+        self, db: AsyncSession, *, owner_id: Optional[int] = None, batch_size: int = 1000
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Yield every item, or every item of `owner_id`, in batches of at most
+        `batch_size` rows read from a server-side cursor.
+
+        Rows are plain result rows, not ORM instances, so nothing accumulates
+        in the session however many rows are read.
+        """
+        table = self.model.__table__  # type: ignore
+        query = select(*self.columns).order_by(table.c.id)
+        if owner_id is not None:
+            query = query.where(table.c.owner_id == owner_id)
+        result = await db.stream(query.execution_options(max_row_buffer=batch_size))
+        async for partition in result.partitions(batch_size):
+            yield partition
+
+    def search(
+        self,
+        db: Session,
+        *,
+        q: str,
+        owner_id: Optional[int] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Item], Optional[str]]:
+        """
+        Items matching the web search style query `q` (words, "quoted
+        phrases", `or`, `-excluded`), best match first, and the cursor of the
+        next page, or None on the last page.
+
+        Matches are found through the GIN index on `search_vector`; only they
+        are ranked. Pages are keyed on (rank, id), so a cursor resumes after
+        the last item of its page however deep it is.
+        """
+        stmt = self._search(q=q, owner_id=owner_id, limit=limit, cursor=cursor)
+        return self._search_page(db.execute(stmt).all(), limit)
+
+    async def search_async(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        owner_id: Optional[int] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Item], Optional[str]]:
+        stmt = self._search(q=q, owner_id=owner_id, limit=limit, cursor=cursor)
+        return self._search_page((await db.execute(stmt)).all(), limit)
+
+    def create_many_with_owner(
+        self, db: Session, *, objs_in: Sequence[ItemCreate], owner_id: int
+    ) -> List[Any]:
+        return self.create_many(db, objs_in=objs_in, values={"owner_id": owner_id})
+
+    def create_many_with_owner_once(
+        self, db: Session, *, key: str, objs_in: Sequence[ItemCreate], owner_id: int
+    ) -> List[int]:
+        """
+        Like `create_many_with_owner`, but at most once per `key`: the batch is
+        recorded in `item_ingest_batch` in the same transaction as its items,
+        and the ids inserted the first time are returned for a key seen before.
+
+        A concurrent transaction with the same key waits on the primary key of
+        the batch until the first one commits or rolls back.
+        """
+        new = db.execute(
+            insert(ItemIngestBatch)
+            .values(id=key, owner_id=owner_id)
+            .on_conflict_do_nothing()
+            .returning(ItemIngestBatch.id)
+        ).first()
+        if new is None:
+            db.rollback()
+            return db.execute(
+                select(ItemIngestBatch.item_ids).filter(ItemIngestBatch.id == key)
+            ).scalar_one()
+        ids = [
+            row.id
+            for stmt in self._insert_many(objs_in, {"owner_id": owner_id})
+            for row in db.execute(stmt)
+        ]
+        db.execute(
+            update(ItemIngestBatch)
+            .filter(ItemIngestBatch.id == key)
+            .values(item_ids=ids)
+        )
+        db.commit()
+        return ids
+
+    def purge_ingest_batches(self, db: Session, *, before: datetime) -> int:
+        """
+        Forget the batches `create_many_with_owner_once` recorded before
+        `before`, return how many.
+        """
+        result = db.execute(
+            delete(ItemIngestBatch).filter(ItemIngestBatch.created_at < before)
+        )
+        db.commit()
+        return result.rowcount
+
+    async def create_many_with_owner_async(
+        self, db: AsyncSession, *, objs_in: Sequence[ItemCreate], owner_id: int
+    ) -> List[Any]:
+        return await self.create_many_async(
+            db, objs_in=objs_in, values={"owner_id": owner_id}
+        )
+
+    async def get_owners_async(
+        self, db: AsyncSession, *, ids: Sequence[int]
+    ) -> Dict[int, int]:
+        """
+        Map each existing id of `ids` to its owner_id, to check a bulk request
+        row by row without loading the items.
+        """
+        result = await db.execute(
+            select(Item.id, Item.owner_id).filter(Item.id.in_(set(ids)))
+        )
+        return dict(result.all())
+
+    def _search(
+        self, *, q: str, owner_id: Optional[int], limit: int, cursor: Optional[str]
+    ) -> Select:
+        # A regconfig literal, asyncpg would send a bound name as varchar
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        query = func.websearch_to_tsquery(config, q)
+        # Double precision, so the rank survives its round trip through a cursor
+        rank = cast(func.ts_rank_cd(Item.search_vector, query), DOUBLE_PRECISION)
+        stmt = (
+            select(Item, rank.label("rank"))
+            .filter(Item.search_vector.bool_op("@@")(query))
+            .order_by(rank.desc(), Item.id)
             .limit(limit)
-            .all()
         )
+        if owner_id is not None:
+            stmt = stmt.filter(Item.owner_id == owner_id)
+        if cursor is not None:
+            last_rank, last_id = decode_cursor(cursor, (float, int))
+            stmt = stmt.filter(
+                or_(rank < last_rank, and_(rank == last_rank, Item.id > last_id))
+            )
+        return stmt
+
+    def _search_page(
+        self, rows: Sequence[Any], limit: int
+    ) -> Tuple[List[Item], Optional[str]]:
+        next_cursor = None
+        if rows and len(rows) == limit:
+            next_cursor = encode_cursor([rows[-1].rank, rows[-1].Item.id])
+        return [row.Item for row in rows], next_cursor
 
 
 item = CRUDItem(Item)
@@ -1,8 +1,11 @@
 from typing import Any, Dict, Optional, Union
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.password_service import password_service
+from app.core.security import basic_auth_cache, credentials_key, invalidate_user_caches
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -13,40 +16,124 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return db.query(User).filter(User.email == email).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
-            is_superuser=obj_in.is_superuser,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        hashed_password = password_service.hash(obj_in.password)
+        return self._write(db, self._insert(self._new_user(obj_in, hashed_password)))
 
     def update(
-        self, db: Session, *, db_obj: User, obj_in: UserUpdate
+        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        update_data = self._update_data(obj_in)
+        if "password" in update_data:
+            update_data["hashed_password"] = password_service.hash(
+                update_data.pop("password")
+            )
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        # Once committed, so a concurrent request can't cache the old user again
+        invalidate_user_caches(user.id)
+        return user
+
+    def remove(self, db: Session, *, id: int) -> User:
+        user = super().remove(db, id=id)
+        invalidate_user_caches(id)
+        return user
+
+    async def get_by_email_async(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
+
+    async def create_async(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        hashed_password = await password_service.hash_async(obj_in.password)
+        return await self._write_async(
+            db, self._insert(self._new_user(obj_in, hashed_password))
+        )
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
     ) -> User:
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = self._update_data(obj_in)
         if "password" in update_data:
-            hashed_password = get_password_hash(update_data["password"])
-            del update_data["password"]
-            update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+            update_data["hashed_password"] = await password_service.hash_async(
+                update_data.pop("password")
+            )
+        user = await super().update_async(db, db_obj=db_obj, obj_in=update_data)
+        invalidate_user_caches(user.id)
+        return user
+
+    async def remove_async(self, db: AsyncSession, *, id: int) -> User:
+        user = await super().remove_async(db, id=id)
+        invalidate_user_caches(id)
+        return user
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not password_service.verify(password, user.hashed_password):
             return None
         return user
 
+    def authenticate_cached(self, db: Session, *, email: str, password: str) -> Optional[User]:
+        """
+        Like `authenticate`, but skips bcrypt for credentials that were verified
+        recently. Meant for HTTP Basic clients, which send them on every request.
+        """
+        user = self.get_by_email(db, email=email)
+        if not user:
+            return None
+        key = credentials_key(email, password, user.hashed_password)
+        if basic_auth_cache.get(key):
+            return user
+        if not password_service.verify(password, user.hashed_password):
+            return None
+        basic_auth_cache.set(key, True, tag=user.id)
+        return user
+
+    async def authenticate_async(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email_async(db, email=email)
+        if not user:
+            return None
+        if not await password_service.verify_async(password, user.hashed_password):
+            return None
+        return user
+
+    async def authenticate_cached_async(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email_async(db, email=email)
+        if not user:
+            return None
+        key = credentials_key(email, password, user.hashed_password)
+        if basic_auth_cache.get(key):
+            return user
+        if not await password_service.verify_async(password, user.hashed_password):
+            return None
+        basic_auth_cache.set(key, True, tag=user.id)
+        return user
+
     def is_active(self, user: User) -> bool:
         return user.is_active
 
     def is_superuser(self, user: User) -> bool:
         return user.is_superuser
 
+    def _new_user(self, obj_in: UserCreate, hashed_password: str) -> Dict[str, Any]:
+        return {
+            "email": obj_in.email,
+            "hashed_password": hashed_password,
+            "full_name": obj_in.full_name,
+            "is_superuser": obj_in.is_superuser,
+        }
+
+    def _update_data(self, obj_in: Union[UserUpdate, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return dict(obj_in)
+        return obj_in.dict(exclude_unset=True)
+
 
 user = CRUDUser(User)
@@ -2,4 +2,5 @@
 # imported by Alembic
 from app.db.base_class import Base  # noqa
 from app.models.item import Item  # noqa
+from app.models.item_ingest_batch import ItemIngestBatch  # noqa
 from app.models.user import User  # noqa
@@ -0,0 +1,128 @@
+"""
+Per-request SQL statistics from engine events.
+
+`instrument` hooks an engine so that every statement is timed and counted
+in the `QueryStats` of the current request, found through a context
+variable set by `QueryStatsMiddleware`. Statements slower than
+`SLOW_QUERY_SECONDS` are logged with their parameters redacted, and a
+statement repeated `N_PLUS_ONE_THRESHOLD` times in one request is reported
+as a likely N+1.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: "Counter[str]" = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """
+        Statements run at least `threshold` times, e.g. once per row of a list.
+        """
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= threshold
+        }
+
+
+request_queries: ContextVar[Optional[QueryStats]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def redact(parameters: Any) -> Any:
+    """
+    Parameters with their values hidden: keys and count are kept for context.
+    """
+    if isinstance(parameters, dict):
+        return {key: "?" for key in parameters}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"<{len(parameters)} parameter sets>"
+        return ["?"] * len(parameters)
+    return "?"
+
+
+def before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    context._query_started = time.perf_counter()
+
+
+def after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    elapsed = time.perf_counter() - context._query_started
+    stats = request_queries.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed >= settings.SLOW_QUERY_SECONDS:
+        logger.warning(
+            "Slow query (%.3fs): %s; parameters: %s", elapsed, statement, redact(parameters)
+        )
+
+
+def instrument(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """
+    Collects the statements of each HTTP request, reports likely N+1
+    queries and, with `DB_DEBUG_HEADERS`, adds `X-DB-Queries` and `X-DB-Time`
+    (milliseconds) to the response.
+
+    The headers count the statements run before the response starts.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = request_queries.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DB_DEBUG_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time"] = f"{stats.seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_queries.reset(token)
+            for statement, count in stats.repeated(settings.N_PLUS_ONE_THRESHOLD).items():
+                logger.warning(
+                    "Possible N+1 in %s %s: statement run %d times: %s",
+                    scope["method"],
+                    scope["path"],
+                    count,
+                    statement,
+                )
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def pool_options(
+    *, budget: int, workers: int, engines: int, timeout: int, recycle: int
+) -> Dict[str, Any]:
+    """
+    Split a total connection `budget` between every worker process and every
+    engine inside them, so that all pools together never exceed it.
+
+    Two thirds of each share are kept open (`pool_size`), the rest can be
+    opened under load (`max_overflow`).
+    """
+    share = max(budget // max(workers * engines, 1), 1)
+    pool_size = max(share * 2 // 3, 1)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": share - pool_size,
+        "pool_timeout": timeout,
+        "pool_recycle": recycle,
+    }
+
+
+class PoolTelemetryMixin:
+    """
+    Records how long checkouts wait for a connection and how often they time out.
+    """
+
+    _telemetry_lock = threading.Lock()
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore
+        except exc.TimeoutError:
+            self._record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self._record_checkout(time.perf_counter() - start, timed_out=False)
+        return connection
+
+    def _record_checkout(self, wait: float, *, timed_out: bool) -> None:
+        with self._telemetry_lock:
+            stats = self.__dict__.setdefault("_telemetry", _empty_telemetry())
+            stats["checkouts"] += 1
+            stats["timeouts"] += timed_out
+            stats["wait_seconds_total"] += wait
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait)
+
+    def telemetry(self) -> Dict[str, Any]:
+        with self._telemetry_lock:
+            stats = dict(self.__dict__.get("_telemetry", _empty_telemetry()))
+        capacity = self.size() + self._max_overflow  # type: ignore
+        checked_out = self.checkedout()  # type: ignore
+        stats.update(
+            {
+                "pool_size": self.size(),  # type: ignore
+                "max_overflow": self._max_overflow,  # type: ignore
+                "checked_out": checked_out,
+                "overflow": self.overflow(),  # type: ignore
+                "saturation": checked_out / capacity if capacity > 0 else 0.0,
+            }
+        )
+        return stats
+
+
+def _empty_telemetry() -> Dict[str, Any]:
+    return {
+        "checkouts": 0,
+        "timeouts": 0,
+        "wait_seconds_total": 0.0,
+        "wait_seconds_max": 0.0,
+    }
+
+
+class InstrumentedQueuePool(PoolTelemetryMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(PoolTelemetryMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,58 @@
+import itertools
+import threading
+from typing import Any, Iterator, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+
+class ReplicaSet:
+    """
+    Replica engines, handed out round-robin.
+    """
+
+    def __init__(self, engines: Sequence[Engine]) -> None:
+        self.engines = list(engines)
+        self._cycle: Iterator[Engine] = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def next(self) -> Engine:
+        with self._lock:
+            return next(self._cycle)
+
+
+class RoutingSession(Session):
+    """
+    Session sending plain SELECTs to a replica and everything else to the
+    primary `bind`.
+
+    The replica is picked once per session, round-robin, so a request reads
+    from a single replica. Once the session has written anything, it sticks to
+    the primary for good, so a request always reads its own writes.
+    """
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.replica: Optional[Engine] = None
+        self.wrote = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+        if self.wrote or not self.replicas:
+            return primary
+        # Anything but a plain SELECT may write
+        if (
+            self._flushing
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+        ):
+            self.wrote = True
+            return primary
+        if self.replica is None:
+            self.replica = self.replicas.next()
+        return self.replica
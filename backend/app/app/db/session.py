@@ -1,7 +1,72 @@
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.instrumentation import instrument
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_options
+from app.db.routing import ReplicaSet, RoutingSession
+
+# Each worker runs a sync and an async engine per database, both sized from DB_POOL_BUDGET
+engine_pool_options = pool_options(
+    budget=settings.DB_POOL_BUDGET,
+    workers=settings.WEB_CONCURRENCY,
+    engines=2,
+    timeout=settings.DB_POOL_TIMEOUT,
+    recycle=settings.DB_POOL_RECYCLE,
+)
+
+def create_sync_engine(uri: str) -> Engine:
+    sync_engine = create_engine(
+        uri, pool_pre_ping=True, poolclass=InstrumentedQueuePool, **engine_pool_options
+    )
+    instrument(sync_engine)
+    return sync_engine
+
+
+def create_asyncio_engine(uri: str) -> AsyncEngine:
+    asyncio_engine = create_async_engine(
+        uri, pool_pre_ping=True, poolclass=InstrumentedAsyncQueuePool, **engine_pool_options
+    )
+    instrument(asyncio_engine.sync_engine)
+    return asyncio_engine
+
+
+engine = create_sync_engine(settings.SQLALCHEMY_DATABASE_URI)
+replica_engines = [create_sync_engine(uri) for uri in settings.SQLALCHEMY_REPLICA_URIS]
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    replicas=ReplicaSet(replica_engines),
+)
+
+async_engine = create_asyncio_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URI)
+async_replica_engines = [
+    create_asyncio_engine(uri) for uri in settings.SQLALCHEMY_ASYNC_REPLICA_URIS
+]
+# Objects stay usable after commit: lazy refreshes can't happen implicitly with asyncio
+AsyncSessionLocal = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=ReplicaSet([e.sync_engine for e in async_replica_engines]),
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def pool_telemetry() -> Dict[str, Dict[str, Any]]:
+    telemetry = {
+        "sync": engine.pool.telemetry(),
+        "async": async_engine.sync_engine.pool.telemetry(),
+    }
+    for i, replica in enumerate(replica_engines):
+        telemetry[f"replica_{i}_sync"] = replica.pool.telemetry()
+    for i, async_replica in enumerate(async_replica_engines):
+        telemetry[f"replica_{i}_async"] = async_replica.sync_engine.pool.telemetry()
+    return telemetry
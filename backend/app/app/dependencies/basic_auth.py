@@ -1,19 +1,20 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models
-from .db import get_db
+from .db import get_async_db, get_db
 
 auth_scheme = HTTPBasic(auto_error=False)
 
 
-def get_current_user(
-    db: Session = Depends(get_db), credentials: HTTPBasicCredentials = Depends(auth_scheme)
-) -> models.User:
-    user = crud.user.authenticate(
-        db, email=credentials.username, password=credentials.password
-    )
+def check_credentials_user(user: Optional[models.User]) -> models.User:
+    """
+    The user the credentials were checked for, otherwise raise a 401.
+    """
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -23,6 +24,27 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db), credentials: HTTPBasicCredentials = Depends(auth_scheme)
+) -> models.User:
+    return check_credentials_user(
+        crud.user.authenticate_cached(
+            db, email=credentials.username, password=credentials.password
+        )
+    )
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPBasicCredentials = Depends(auth_scheme),
+) -> models.User:
+    return check_credentials_user(
+        await crud.user.authenticate_cached_async(
+            db, email=credentials.username, password=credentials.password
+        )
+    )
+
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -39,3 +61,15 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    return get_current_active_user(current_user)
+
+
+async def get_current_active_superuser_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    return get_current_active_superuser(current_user)
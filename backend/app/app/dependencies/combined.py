@@ -1,15 +1,18 @@
-from fastapi import Depends, HTTPException, Security, status
+from fastapi import Depends, HTTPException, Security
 from fastapi.security import SecurityScopes, HTTPBasicCredentials
-from jose import jwt
-from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app import crud, models, schemas
-from app.core import security
-from app.core.config import settings
-from .basic_auth import auth_scheme
-from .db import get_db
-from .oauth2 import oauth2_password_scheme, oauth2_authorization_code_scheme
+from app import crud, models
+from .basic_auth import auth_scheme, check_credentials_user
+from .db import get_async_db, get_db
+from .oauth2 import (
+    check_token_scopes,
+    get_token_user,
+    get_token_user_async,
+    oauth2_authorization_code_scheme,
+    oauth2_password_scheme,
+)
 
 
 def get_current_user(
@@ -21,48 +24,33 @@ def get_current_user(
 ) -> models.User:
     token = password_token or auth_code_token
     if token:
-        if security_scopes.scopes:
-            authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
-        else:
-            authenticate_value = f"Bearer"
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": authenticate_value},
-        )
-        try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-            )
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                raise credentials_exception
-            token_scopes = payload.get("scopes", [])
-            token_data = schemas.TokenPayload(scopes=token_scopes, user_id=user_id)
-        except (jwt.JWTError, ValidationError):
-            raise credentials_exception
-        user = crud.user.get(db, id=token_data.user_id)
-        if not user:
-            raise credentials_exception
-        for scope in security_scopes.scopes:
-            if scope not in token_data.scopes:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not enough permissions",
-                    headers={"WWW-Authenticate": authenticate_value},
-                )
-        return user
+        return check_token_scopes(security_scopes, get_token_user(db, token))
     elif credentials:
-        user = crud.user.authenticate(
-            db, email=credentials.username, password=credentials.password
+        return check_credentials_user(
+            crud.user.authenticate_cached(
+                db, email=credentials.username, password=credentials.password
+            )
         )
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password",
-                headers={"WWW-Authenticate": "Basic"},
+
+
+async def get_current_user_async(
+    security_scopes: SecurityScopes,
+    db: AsyncSession = Depends(get_async_db),
+    password_token: str = Depends(oauth2_password_scheme),
+    auth_code_token: str = Depends(oauth2_authorization_code_scheme),
+    credentials: HTTPBasicCredentials = Depends(auth_scheme),
+) -> models.User:
+    token = password_token or auth_code_token
+    if token:
+        return check_token_scopes(
+            security_scopes, await get_token_user_async(db, token)
+        )
+    elif credentials:
+        return check_credentials_user(
+            await crud.user.authenticate_cached_async(
+                db, email=credentials.username, password=credentials.password
             )
-        return user
+        )
 
 
 def get_current_active_user(
@@ -81,3 +69,15 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_current_active_user_async(
+    current_user: models.User = Security(get_current_user_async, scopes=["me"]),
+) -> models.User:
+    return get_current_active_user(current_user)
+
+
+async def get_current_active_superuser_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    return get_current_active_superuser(current_user)
@@ -1,13 +1,18 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
 from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2AuthorizationCodeBearer, SecurityScopes
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
-from .db import get_db
+from .db import get_async_db, get_db
 
 oauth2_password_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token",
@@ -24,33 +29,130 @@ oauth2_authorization_code_scheme = OAuth2AuthorizationCodeBearer(
 
 oauth2_scheme = oauth2_password_scheme
 
+# Read from the database on every request, even for a cached token: a write
+# on another worker doesn't clear this worker's cache
+AUTH_COLUMNS = ("is_active", "is_superuser")
 
-def get_current_user(
-    security_scopes: SecurityScopes, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
-    if security_scopes.scopes:
-        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
-    else:
-        authenticate_value = f"Bearer"
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": authenticate_value},
-    )
+
+def _snapshot_user(user: models.User) -> Dict[str, Any]:
+    return {
+        attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs
+    }
+
+
+def _restore_user(db: Session, snapshot: Dict[str, Any]) -> models.User:
+    # Attach the snapshot to the session as an already persisted row, no SELECT issued
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _decode_token(token: str) -> Optional[Tuple[schemas.TokenPayload, Optional[float]]]:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            return None
         token_scopes = payload.get("scopes", [])
         token_data = schemas.TokenPayload(scopes=token_scopes, user_id=user_id)
     except (jwt.JWTError, ValidationError):
-        raise credentials_exception
+        return None
+    return token_data, payload.get("exp")
+
+
+def _cache_token(
+    token: str,
+    token_data: schemas.TokenPayload,
+    user: models.User,
+    expires: Optional[float],
+) -> None:
+    security.token_cache.set(
+        token,
+        (token_data, _snapshot_user(user)),
+        ttl=expires - time.time() if expires else None,
+        tag=user.id,
+    )
+
+
+def get_token_user(
+    db: Session, token: Optional[str]
+) -> Optional[Tuple[models.User, schemas.TokenPayload]]:
+    """
+    Decode an access token and load its user, return None if either is invalid.
+
+    Verified tokens are kept in `security.token_cache` with a snapshot of the
+    user, so repeated requests with the same token skip `jwt.decode` and
+    loading the whole user. Only the user's `AUTH_COLUMNS` and version are
+    read; the snapshot is used while its version is current.
+    """
+    if not token:
+        return None
+    cached = security.token_cache.get(token)
+    if cached is not None:
+        token_data, snapshot = cached
+        current = crud.user.get_version(db, id=snapshot["id"], columns=AUTH_COLUMNS)
+        if current is None:
+            return None
+        if current["version"] == snapshot["version"]:
+            return _restore_user(db, {**snapshot, **current}), token_data
+    decoded = _decode_token(token)
+    if decoded is None:
+        return None
+    token_data, expires = decoded
     user = crud.user.get(db, id=token_data.user_id)
     if not user:
-        raise credentials_exception
+        return None
+    _cache_token(token, token_data, user, expires)
+    return user, token_data
+
+
+async def get_token_user_async(
+    db: AsyncSession, token: Optional[str]
+) -> Optional[Tuple[models.User, schemas.TokenPayload]]:
+    if not token:
+        return None
+    cached = security.token_cache.get(token)
+    if cached is not None:
+        token_data, snapshot = cached
+        current = await crud.user.get_version_async(
+            db, id=snapshot["id"], columns=AUTH_COLUMNS
+        )
+        if current is None:
+            return None
+        if current["version"] == snapshot["version"]:
+            return _restore_user(db.sync_session, {**snapshot, **current}), token_data
+    decoded = _decode_token(token)
+    if decoded is None:
+        return None
+    token_data, expires = decoded
+    user = await crud.user.get_async(db, id=token_data.user_id)
+    if not user:
+        return None
+    _cache_token(token, token_data, user, expires)
+    return user, token_data
+
+
+def check_token_scopes(
+    security_scopes: SecurityScopes,
+    token_user: Optional[Tuple[models.User, schemas.TokenPayload]],
+) -> models.User:
+    """
+    The user of a token that has all of `security_scopes`, otherwise raise a 401
+    or 403.
+    """
+    if security_scopes.scopes:
+        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
+    else:
+        authenticate_value = f"Bearer"
+    if token_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": authenticate_value},
+        )
+    user, token_data = token_user
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
             raise HTTPException(
@@ -61,6 +163,20 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    security_scopes: SecurityScopes, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    return check_token_scopes(security_scopes, get_token_user(db, token))
+
+
+async def get_current_user_async(
+    security_scopes: SecurityScopes,
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
+) -> models.User:
+    return check_token_scopes(security_scopes, await get_token_user_async(db, token))
+
+
 def get_current_active_user(
     current_user: models.User = Security(get_current_user, scopes=["me"]),
 ) -> models.User:
@@ -77,3 +193,15 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_current_active_user_async(
+    current_user: models.User = Security(get_current_user_async, scopes=["me"]),
+) -> models.User:
+    return get_current_active_user(current_user)
+
+
+async def get_current_active_superuser_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    return get_current_active_superuser(current_user)
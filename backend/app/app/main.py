@@ -1,12 +1,21 @@
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+from sentry_sdk.integrations.redis import RedisIntegration
+from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
 from app.api.api_v1.routers.utils import health_check
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.password_service import PasswordServiceBusy, password_service
+from app.crud.pagination import InvalidCursor
+from app.db.instrumentation import QueryStatsMiddleware
+from app.db.session import async_engine, async_replica_engines
+from app.rpc import rpc_pool
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -20,12 +29,46 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "ETag", "X-DB-Queries", "X-DB-Time"],
     )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 app.get(f"{settings.API_V1_STR}/health_check/")(health_check)
+app.get("/metrics", include_in_schema=False)(metrics)
 app.mount("/static", StaticFiles(directory="static"), name="static")
+app.add_event_handler("startup", rpc_pool().start)
+app.add_event_handler("shutdown", rpc_pool().stop)
+app.add_event_handler("shutdown", password_service.shutdown)
+app.add_event_handler("shutdown", async_engine.dispose)
+for async_replica_engine in async_replica_engines:
+    app.add_event_handler("shutdown", async_replica_engine.dispose)
+
+
+@app.exception_handler(PasswordServiceBusy)
+async def password_service_busy_handler(
+    request: Request, exc: PasswordServiceBusy
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 
 # https://docs.sentry.io/platforms/python/guides/asgi/
-sentry_sdk.init(dsn=settings.SENTRY_DSN)
+# Integrations listed rather than auto-enabled: the Celery one would import
+# celery in every app process, which only sends a task now and then. These
+# are the ones sentry-sdk 1.5 auto-enabled for the app's packages, requests
+# are captured by SentryAsgiMiddleware
+sentry_sdk.init(
+    dsn=settings.SENTRY_DSN,
+    auto_enabling_integrations=False,
+    integrations=[SqlalchemyIntegration(), RedisIntegration()],
+)
 app = SentryAsgiMiddleware(app)
@@ -1,2 +1,3 @@
 from .item import Item
 from .user import User
+from .item_ingest_batch import ItemIngestBatch
@@ -1,17 +1,40 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base_class import Base
 
 if TYPE_CHECKING:
     from .user import User  # noqa: F401
 
+# Text search configuration of `Item.search_vector` and of the queries matching it
+SEARCH_CONFIG = "english"
+
 
 class Item(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
-    description = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+    description = Column(String)
     owner_id = Column(Integer, ForeignKey("user.id"))
+    # Bumped by every update, see CRUDBase
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by the database; title matches rank above description matches
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
     owner = relationship("User", back_populates="items")
+
+    __table_args__ = (
+        # Serves the owner filter and the keyset pagination of owner listings
+        Index("ix_item_owner_id_id", "owner_id", "id"),
+        Index("ix_item_search_vector", "search_vector", postgresql_using="gin"),
+    )
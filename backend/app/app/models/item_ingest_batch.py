@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.db.base_class import Base
+
+
+class ItemIngestBatch(Base):
+    """
+    A batch of items ingested by `app.worker.ingest_items`, keyed by the id
+    the batch was queued with, so that a redelivered batch isn't inserted
+    again.
+    """
+
+    __tablename__ = "item_ingest_batch"
+
+    id = Column(String(36), primary_key=True)
+    owner_id = Column(
+        Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    item_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    # Rows older than ITEM_INGEST_BATCH_RETENTION_HOURS are deleted by
+    # `app.worker.purge_item_ingest_batches`
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
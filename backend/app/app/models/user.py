@@ -10,12 +10,14 @@ if TYPE_CHECKING:
 
 
 class User(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    full_name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    full_name = Column(String)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
+    # Bumped by every update, see CRUDBase
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     items = relationship("Item", back_populates="owner")
 
     def __str__(self):
@@ -0,0 +1,112 @@
+"""
+A Nameko RPC client whose calls are bounded by one deadline.
+
+Imported by `app.rpc` once a client connects, as nameko imports eventlet.
+"""
+import logging
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from nameko.exceptions import RpcTimeout
+from nameko.standalone.rpc import (
+    ClusterRpcProxy,
+    PollingQueueConsumer,
+    SingleThreadedReplyListener,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineQueueConsumer(PollingQueueConsumer):
+    """
+    Waits for replies until `deadline` (a `time.monotonic()` time) rather
+    than `timeout` seconds per read of the socket, and connects within it.
+
+    Replies to calls nobody waits for anymore, those that timed out, are
+    acked and dropped: nameko keeps them in `replies`, which a long-lived
+    client would grow forever.
+    """
+
+    deadline: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return self.timeout
+        return self.deadline - time.monotonic()
+
+    def _setup_consumer(self) -> None:
+        if not self.connection.connected:
+            remaining = self.remaining()
+            if remaining is not None and remaining <= 0:
+                raise socket.timeout("timed out before connecting")
+            # A single attempt, kombu retries after sleeping 2 seconds
+            self.connection.connect_timeout = remaining
+            self.connection._ensure_connection(
+                max_retries=0, reraise_as_library_errors=False
+            )
+        super()._setup_consumer()
+
+    def on_message(self, body: Any, message: Any) -> None:
+        correlation_id = message.properties.get("correlation_id")
+        if correlation_id not in self.provider._reply_events:
+            message.ack()
+            return
+        super().on_message(body, message)
+
+    def get_message(self, correlation_id: str) -> None:
+        while correlation_id not in self.replies:
+            remaining = self.remaining()
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise socket.timeout()
+                self.consumer.connection.drain_events(timeout=remaining)
+            except socket.timeout:
+                self._time_out(correlation_id)
+                return
+            except (IOError, ConnectionError):
+                # A temporary error, reconnect and wait for the rest of the time
+                try:
+                    self._setup_consumer()
+                except socket.timeout:
+                    self._time_out(correlation_id)
+                    return
+                except (IOError, ConnectionError):
+                    self.provider._reply_events.pop(correlation_id, None)
+                    raise
+
+        body, message = self.replies.pop(correlation_id)
+        self.provider.handle_message(body, message)
+
+    def _time_out(self, correlation_id: str) -> None:
+        event = self.provider._reply_events.pop(correlation_id)
+        event.send_exception(RpcTimeout(self.timeout))
+        self.replies.clear()
+        # As nameko does, the socket timeout may have broken the channel
+        try:
+            self._setup_consumer()
+        except (IOError, ConnectionError) as e:
+            # The next call finds the client disconnected, and the pool
+            # replaces it
+            logger.debug("Setting up the RPC reply consumer failed: %r", e)
+            self.connection.close()
+
+
+class DeadlineReplyListener(SingleThreadedReplyListener):
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        super().__init__(timeout=timeout)
+        self.queue_consumer = DeadlineQueueConsumer(timeout=timeout)
+
+
+def connect(
+    config: Dict[str, Any], *, timeout: float, deadline: float
+) -> ClusterRpcProxy:
+    """
+    A started client, connected by `deadline` or raising `socket.timeout`.
+    """
+    client = ClusterRpcProxy(
+        config, timeout=timeout, reply_listener_cls=DeadlineReplyListener
+    )
+    client._reply_listener.queue_consumer.deadline = deadline
+    client.start()
+    return client
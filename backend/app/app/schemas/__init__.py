@@ -1,4 +1,13 @@
-from .item import Item, ItemCreate, ItemInDB, ItemUpdate
+from .bulk import BulkError
+from .item import (
+    Item,
+    ItemBulkResult,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemExportFormat,
+    ItemInDB,
+    ItemUpdate,
+)
 from .msg import Msg
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
@@ -0,0 +1,10 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Error of one row of a bulk request, `index` is its position in the request
+class BulkError(BaseModel):
+    index: int
+    id: Optional[int] = None
+    detail: str
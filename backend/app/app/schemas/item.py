@@ -1,7 +1,10 @@
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 
 from pydantic import BaseModel
 
+from .bulk import BulkError
+
 
 # Shared properties
 class ItemBase(BaseModel):
@@ -19,6 +22,11 @@ class ItemUpdate(ItemBase):
     pass
 
 
+# Properties to receive for each item of a bulk update
+class ItemBulkUpdate(ItemUpdate):
+    id: int
+
+
 # Properties shared by models stored in DB
 class ItemInDBBase(ItemBase):
     id: int
@@ -37,3 +45,14 @@ class Item(ItemInDBBase):
 # Properties properties stored in DB
 class ItemInDB(ItemInDBBase):
     pass
+
+
+# Result of a bulk request: the written items and the rows that were rejected
+class ItemBulkResult(BaseModel):
+    items: List[Item]
+    errors: List[BulkError] = []
+
+
+class ItemExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
@@ -1,8 +1,20 @@
+import csv
+import io
+import json
+from typing import Any
+
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app import crud
 from app.core.config import settings
+from app.crud.pagination import encode_cursor
+from app.dependencies import db as db_dependency
+from app.schemas.item import ItemCreate
+from app.schemas.user import UserCreate
 from app.tests.utils.item import create_random_item
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_email, random_lower_string
 
 
 def test_create_item(
@@ -33,3 +45,241 @@ def test_read_item(
     assert content["description"] == item.description
     assert content["id"] == item.id
     assert content["owner_id"] == item.owner_id
+
+
+def test_read_items_cursor(
+    client: TestClient, superuser_token_headers: dict, db: Session
+) -> None:
+    create_random_item(db)
+    create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=superuser_token_headers, params={"limit": 1},
+    )
+    assert response.status_code == 200
+    first_page = response.json()
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"limit": 1, "cursor": cursor},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page[0]["id"] > first_page[0]["id"]
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    for values in (["x"], [True], [1.5], [None]):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            params={"cursor": encode_cursor(values)},
+        )
+        assert response.status_code == 400
+
+
+def test_bulk_items(
+    client: TestClient, normal_user_token_headers: dict, db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "Foo"}, {"title": "Bar", "description": "Baz"}],
+    )
+    assert response.status_code == 200
+    created = response.json()["items"]
+    assert [item["title"] for item in created] == ["Foo", "Bar"]
+
+    other_item = create_random_item(db)
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[
+            {"id": created[0]["id"], "description": "Fighters"},
+            {"id": other_item.id, "title": "Stolen"},
+            {"id": created[0]["id"], "title": "Again"},
+        ],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [item["description"] for item in content["items"]] == ["Fighters"]
+    assert content["errors"] == [
+        {"index": 1, "id": other_item.id, "detail": "Not enough permissions"},
+        {"index": 2, "id": created[0]["id"], "detail": "Duplicate item id"},
+    ]
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[item["id"] for item in created] + [other_item.id],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert sorted(item["id"] for item in content["items"]) == [item["id"] for item in created]
+    assert [error["index"] for error in content["errors"]] == [2]
+
+
+def test_export_items(
+    client: TestClient, normal_user_token_headers: dict, db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json=[{"title": "Foo"}, {"title": "Bar", "description": "Baz"}],
+    )
+    created = response.json()["items"]
+    other_item = create_random_item(db)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export", headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    ids = [item["id"] for item in exported]
+    assert all(item["id"] in ids for item in created)
+    assert other_item.id not in ids
+    assert len({item["owner_id"] for item in exported}) == 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == ids
+
+
+def test_read_item_etag(
+    client: TestClient, superuser_token_headers: dict, db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item.id}", headers=superuser_token_headers,
+    )
+    etag = response.headers["ETag"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item.id}",
+        headers={**superuser_token_headers, "If-None-Match": f'W/"x", {etag}'},
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.put(
+        f"{settings.API_V1_STR}/items/{item.id}",
+        headers=superuser_token_headers,
+        json={"title": "Foo"},
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item.id}",
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_read_item_etag_not_owner(
+    client: TestClient, normal_user_token_headers: dict, db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item.id}",
+        headers={**normal_user_token_headers, "If-None-Match": "*"},
+    )
+    assert response.status_code == 400
+
+
+def test_search_items(
+    client: TestClient, superuser_token_headers: dict, db: Session
+) -> None:
+    word = random_lower_string()
+    owner = create_random_user(db)
+    in_description = crud.item.create_with_owner(
+        db,
+        obj_in=ItemCreate(title="Notes", description=f"About {word}"),
+        owner_id=owner.id,
+    )
+    in_title = crud.item.create_with_owner(
+        db,
+        obj_in=ItemCreate(title=f"{word} report", description="Quarterly"),
+        owner_id=owner.id,
+    )
+    in_description_id, in_title_id = in_description.id, in_title.id
+    response = client.get(
+        f"{settings.API_V1_STR}/items/search",
+        headers=superuser_token_headers,
+        params={"q": word, "limit": 1},
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [in_title_id]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/search",
+        headers=superuser_token_headers,
+        params={"q": word, "limit": 1, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [in_description_id]
+
+
+def test_search_items_invalid(
+    client: TestClient, superuser_token_headers: dict
+) -> None:
+    for params, status_code in (
+        ({"q": "word", "cursor": encode_cursor(["x", 1])}, 400),
+        ({"q": "word", "cursor": encode_cursor([0.5, "x"])}, 400),
+        ({"q": "word", "limit": -1}, 422),
+        ({"q": "word", "limit": settings.SEARCH_MAX_LIMIT + 1}, 422),
+    ):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/search",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert response.status_code == status_code
+
+
+def test_search_items_owner(
+    client: TestClient, normal_user_token_headers: dict, db: Session
+) -> None:
+    word = random_lower_string()
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    item_in = ItemCreate(title=word, description="Shared word")
+    own = crud.item.create_with_owner(db, obj_in=item_in, owner_id=user.id)
+    own_id = own.id
+    crud.item.create_with_owner(
+        db, obj_in=item_in, owner_id=create_random_user(db).id
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/items/search",
+        headers=normal_user_token_headers,
+        params={"q": word},
+    )
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [own_id]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_read_items_authenticates_async(
+    client: TestClient, superuser_token_headers: dict, db: Session, monkeypatch: Any
+) -> None:
+    email, password = random_email(), random_lower_string()
+    crud.user.create(db, obj_in=UserCreate(email=email, password=password))
+
+    def sync_session() -> None:
+        raise AssertionError("async routes authenticate on the AsyncSession")
+
+    monkeypatch.setattr(db_dependency, "SessionLocal", sync_session)
+    response = client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert response.status_code == 200
+    response = client.get(f"{settings.API_V1_STR}/items/", auth=(email, password))
+    assert response.status_code == 200
+    response = client.get(f"{settings.API_V1_STR}/items/", auth=(email, "wrong"))
+    assert response.status_code == 401
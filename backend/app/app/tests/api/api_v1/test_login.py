@@ -1,8 +1,13 @@
 from typing import Dict
 
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from app import crud
 from app.core.config import settings
+from app.schemas.user import UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+from app.utils import generate_password_reset_token
 
 
 def test_get_access_token(client: TestClient) -> None:
@@ -26,3 +31,20 @@ def test_use_access_token(
     result = r.json()
     assert r.status_code == 200
     assert "email" in result
+
+
+def test_reset_password(client: TestClient, db: Session) -> None:
+    email = random_email()
+    crud.user.create(db, obj_in=UserCreate(email=email, password=random_lower_string()))
+    new_password = random_lower_string()
+    r = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        json={"token": generate_password_reset_token(email), "new_password": new_password},
+    )
+    assert r.status_code == 200
+    assert crud.user.authenticate(db, email=email, password=new_password)
+    r = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        json={"token": "invalid", "new_password": new_password},
+    )
+    assert r.status_code == 400
@@ -1,11 +1,13 @@
 from typing import Dict
 
 from fastapi.testclient import TestClient
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from app import crud
+from app import crud, models
 from app.core.config import settings
-from app.schemas.user import UserCreate
+from app.schemas.user import UserCreate, UserUpdate
+from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -113,3 +115,77 @@ def test_retrieve_users(
     assert len(all_users) > 1
     for item in all_users:
         assert "email" in item
+
+
+def test_get_users_me_after_update(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert user
+    full_name = random_lower_string()
+    crud.user.update(db, db_obj=user, obj_in=UserUpdate(full_name=full_name))
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.json()["full_name"] == full_name
+
+
+def test_get_users_me_etag(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    etag = r.headers["ETag"]
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={**normal_user_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert user
+    crud.user.update(db, db_obj=user, obj_in=UserUpdate(full_name=random_lower_string()))
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={**normal_user_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_get_users_me_etag_updated_elsewhere(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    etag = r.headers["ETag"]
+    # Updated by another worker: this one's token cache isn't invalidated
+    full_name = random_lower_string()
+    db.execute(
+        update(models.User)
+        .where(models.User.email == settings.EMAIL_TEST_USER)
+        .values(full_name=full_name, version=models.User.version + 1)
+    )
+    db.commit()
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={**normal_user_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["full_name"] == full_name
+
+
+def test_get_users_me_deactivated_elsewhere(client: TestClient, db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.user.create(db, obj_in=UserCreate(email=email, password=password))
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    # Deactivated by another worker, the token stays in this one's cache
+    db.execute(
+        update(models.User).where(models.User.id == user.id).values(is_active=False)
+    )
+    db.commit()
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    r = client.put(f"{settings.API_V1_STR}/users/me", headers=headers, json={})
+    assert r.status_code == 400
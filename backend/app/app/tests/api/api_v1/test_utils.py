@@ -0,0 +1,34 @@
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+
+from app.api.api_v1.routers import utils
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+def test_db_pool(client: TestClient, superuser_token_headers: Dict[str, str]) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/db-pool/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    telemetry = r.json()
+    assert set(telemetry) == {"sync", "async"}
+    assert "wait_seconds_max" in telemetry["sync"]
+    assert "saturation" in telemetry["async"]
+
+
+def test_db_pool_normal_user(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/db-pool/", headers=normal_user_token_headers)
+    assert r.status_code == 400
+
+
+def test_cache_stats(
+    client: TestClient, superuser_token_headers: Dict[str, str], monkeypatch: Any
+) -> None:
+    monkeypatch.setattr(utils, "cache_backend", TTLCache(maxsize=10, ttl=30))
+    r = client.get(f"{settings.API_V1_STR}/utils/cache/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    stats = r.json()
+    assert "hit_ratio" in stats["token"]
+    assert "evictions" in stats["crud"]
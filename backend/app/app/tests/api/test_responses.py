@@ -0,0 +1,24 @@
+from app import models, schemas
+from app.api.responses import fast_json, serialize_item, serialize_user
+
+
+def test_serializers_match_schemas() -> None:
+    item = models.Item(id=1, title="Foo", description=None, owner_id=2)
+    user = models.User(
+        id=2,
+        email="foo@example.com",
+        is_active=True,
+        is_superuser=False,
+        full_name="Foo",
+    )
+    assert serialize_item(item) == schemas.Item.from_orm(item).dict()
+    assert serialize_user(user) == schemas.User.from_orm(user).dict()
+
+
+def test_fast_json() -> None:
+    item = models.Item(id=1, title="Foo", description="Fighters", owner_id=2)
+    response = fast_json([item], serialize_item, headers={"X-Next-Cursor": "abc"})
+    assert response.body == (
+        b'[{"title":"Foo","description":"Fighters","id":1,"owner_id":2}]'
+    )
+    assert response.headers["X-Next-Cursor"] == "abc"
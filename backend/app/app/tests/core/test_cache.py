@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.cache import RedisCache, TTLCache
+from app.core.config import Settings
+from app.tests.utils.redis import LocalRedis
+
+
+def test_cache_hit_and_miss() -> None:
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_expires_entries() -> None:
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_invalidate_tag() -> None:
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, tag=1)
+    cache.set("b", 2, tag=1)
+    cache.set("c", 3, tag=2)
+    cache.invalidate_tag(1)
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_redis_cache() -> None:
+    cache = RedisCache(LocalRedis(), ttl=60, prefix="test:")
+    assert cache.get("a") is None
+    cache.set("a", {"id": 1, "title": "Foo"})
+    assert cache.get("a") == {"id": 1, "title": "Foo"}
+    cache.delete("a")
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_redis_cache_fails_open() -> None:
+    client = LocalRedis()
+    cache = RedisCache(client, ttl=60)
+    cache.set("a", 1)
+    client.down = True
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.stats()["errors"] == 3
+
+
+def test_memory_crud_cache_single_worker() -> None:
+    assert Settings(CRUD_CACHE_BACKEND="memory").CRUD_CACHE_BACKEND == "memory"
+    with pytest.raises(ValidationError):
+        Settings(CRUD_CACHE_BACKEND="memory", WEB_CONCURRENCY=2)
+    Settings(CRUD_CACHE_BACKEND="redis", WEB_CONCURRENCY=2)
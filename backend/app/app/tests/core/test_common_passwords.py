@@ -0,0 +1,15 @@
+from pathlib import Path
+
+from app.core.common_passwords import CommonPasswordIndex, build_index
+
+
+def test_index_lookup(tmp_path: Path) -> None:
+    passwords = ["welcome", "sandy123", "abc", "abcd", "mewtwo"]
+    index = CommonPasswordIndex(build_index(passwords, tmp_path / "passwords.idx"))
+    assert len(index) == len(passwords)
+    for password in passwords:
+        assert password in index
+    assert "ab" not in index
+    assert "abcde" not in index
+    assert "zzzzzzzzzzzzzzzzzzzzzzzz" not in index
+    assert "" not in index
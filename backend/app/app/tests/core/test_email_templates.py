@@ -0,0 +1,27 @@
+import os
+from pathlib import Path
+
+from app.core.email_templates import TemplateRegistry
+
+
+def write_template(path: Path, text: str, mtime: int) -> None:
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_templates_compiled_once(tmp_path: Path) -> None:
+    write_template(tmp_path / "hello.html", "Hello {{ name }}", 1_000_000)
+    registry = TemplateRegistry(str(tmp_path))
+    assert registry.render("hello.html", name="you") == "Hello you"
+    write_template(tmp_path / "hello.html", "Bye {{ name }}", 2_000_000)
+    assert registry.get("hello.html") is registry.get("hello.html")
+    assert registry.render("hello.html", name="you") == "Hello you"
+
+
+def test_templates_auto_reload(tmp_path: Path) -> None:
+    write_template(tmp_path / "hello.html", "Hello {{ name }}", 1_000_000)
+    registry = TemplateRegistry(str(tmp_path), auto_reload=True)
+    registry.preload()
+    assert registry.render("hello.html", name="you") == "Hello you"
+    write_template(tmp_path / "hello.html", "Bye {{ name }}", 2_000_000)
+    assert registry.render("hello.html", name="you") == "Bye you"
@@ -0,0 +1,138 @@
+import email
+import smtplib
+from pathlib import Path
+from typing import Any
+
+import emails
+
+from app import utils, worker
+from app.core.config import settings
+from app.core.email_templates import TemplateRegistry
+from app.core.mailer import SMTPPool, is_transient
+from app.tests.utils.smtp import LocalSMTP
+
+
+def message(email_to: str) -> emails.Message:
+    return emails.Message(
+        subject="Subject",
+        html="<p>Body</p>",
+        mail_from="from@example.com",
+        mail_to=email_to,
+    )
+
+
+def local_pool(server: LocalSMTP, **kwargs: Any) -> SMTPPool:
+    kwargs.setdefault("size", 1)
+    kwargs.setdefault("max_messages", 100)
+    return SMTPPool({"host": "localhost", "port": server.port}, **kwargs)
+
+
+def test_send_many_reuses_connection() -> None:
+    with LocalSMTP() as server:
+        pool = local_pool(server)
+        errors = pool.send_many([message(f"to{i}@example.com") for i in range(3)])
+        pool.send(message("last@example.com"))
+        pool.close()
+    assert errors == [None, None, None]
+    assert [recipients for _, recipients, _ in server.messages] == [
+        ["to0@example.com"],
+        ["to1@example.com"],
+        ["to2@example.com"],
+        ["last@example.com"],
+    ]
+    assert server.connections == 1
+
+
+def test_send_many_max_messages() -> None:
+    with LocalSMTP() as server:
+        pool = local_pool(server, max_messages=2)
+        pool.send_many([message(f"to{i}@example.com") for i in range(5)])
+        pool.close()
+    assert len(server.messages) == 5
+    assert server.connections == 3
+
+
+def test_send_many_errors() -> None:
+    with LocalSMTP() as server:
+        server.replies = [451, 550]
+        pool = local_pool(server)
+        errors = pool.send_many([message(f"to{i}@example.com") for i in range(3)])
+        pool.close()
+    assert isinstance(errors[0], smtplib.SMTPSenderRefused)
+    assert is_transient(errors[0])
+    assert isinstance(errors[1], smtplib.SMTPSenderRefused)
+    assert not is_transient(errors[1])
+    assert errors[2] is None
+    assert len(server.messages) == 1
+
+
+def test_send_emails_task_retries(monkeypatch: Any, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "EMAILS_ENABLED", True)
+    monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "from@example.com")
+    (tmp_path / "hello.html").write_text("<p>Hello {{ name }}</p>")
+    registry = TemplateRegistry(str(tmp_path))
+    monkeypatch.setattr(utils, "template_registry", lambda: registry)
+    with LocalSMTP() as server:
+        pool = local_pool(server)
+        monkeypatch.setattr(utils, "smtp_pool", lambda: pool)
+        server.replies = [451]
+        messages = [
+            {
+                "email_to": f"to{i}@example.com",
+                "subject": "Hello",
+                "template": "hello.html",
+                "environment": {"name": f"user {i}"},
+            }
+            for i in range(2)
+        ]
+        # Run eagerly, the retry of the failed message included
+        worker.send_emails.apply(args=[messages])
+        pool.close()
+    sent = {
+        recipients[0]: email.message_from_bytes(data)
+        for _, recipients, data in server.messages
+    }
+    assert sorted(sent) == ["to0@example.com", "to1@example.com"]
+    html = next(
+        part
+        for part in sent["to0@example.com"].walk()
+        if part.get_content_type() == "text/html"
+    )
+    assert html.get_payload(decode=True) == b"<p>Hello user 0</p>"
+
+
+def test_new_account_email_has_no_password(monkeypatch: Any) -> None:
+    monkeypatch.setattr(settings, "EMAILS_ENABLED", True)
+    monkeypatch.setattr(settings, "EMAILS_FROM_EMAIL", "from@example.com")
+    registry = TemplateRegistry(
+        str(Path(utils.__file__).parent / "email-templates" / "build")
+    )
+    monkeypatch.setattr(utils, "template_registry", lambda: registry)
+    with LocalSMTP() as server:
+        pool = local_pool(server)
+        monkeypatch.setattr(utils, "smtp_pool", lambda: pool)
+        worker.send_new_account_email.apply(
+            kwargs={"email_to": "new@example.com", "username": "new@example.com"}
+        )
+        # As queued before the password was left out of the task
+        worker.send_new_account_email.apply(
+            kwargs={
+                "email_to": "old@example.com",
+                "username": "old@example.com",
+                "password": "queued-password",
+            }
+        ).get()
+        pool.close()
+    assert [recipients for _, recipients, _ in server.messages] == [
+        ["new@example.com"],
+        ["old@example.com"],
+    ]
+    for _, _, data in server.messages:
+        html = next(
+            part
+            for part in email.message_from_bytes(data).walk()
+            if part.get_content_type() == "text/html"
+        ).get_payload(decode=True).decode()
+        assert "Username: " in html
+        assert "Password:" not in html
+        assert "queued-password" not in html
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import render_metrics
+
+INCREMENT = (
+    "from app.core.metrics import REQUESTS; "
+    "REQUESTS.labels('GET', '/api/v1/items/{id}', '200').inc()"
+)
+
+
+def test_metrics_endpoint(client: TestClient, superuser_token_headers: dict) -> None:
+    client.get(f"{settings.API_V1_STR}/users/me", headers=superuser_token_headers)
+    client.get("/not-a-route")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/users/me",status="200"}'
+        in r.text
+    )
+    assert 'route="<unmatched>",status="404"' in r.text
+    assert "http_request_duration_seconds_bucket" in r.text
+    assert "http_requests_in_flight" in r.text
+
+
+def test_metrics_aggregate_worker_processes(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", INCREMENT], check=True)
+    data, _ = render_metrics()
+    assert (
+        b'http_requests_total{method="GET",route="/api/v1/items/{id}",status="200"} 2.0'
+        in data
+    )
@@ -0,0 +1,32 @@
+from app.core.password_policy import password_policy
+
+
+def test_policy_stops_at_first_error() -> None:
+    errors = password_policy.validate("1234")
+    assert errors == [
+        "This password is too short. It must contain at least 8 characters."
+    ]
+
+
+def test_policy_all_errors() -> None:
+    errors = password_policy.validate("1234", all_errors=True)
+    assert "This password is entirely numeric." in errors
+    assert len(errors) > 1
+
+
+def test_policy_user_attribute_similarity() -> None:
+    errors = password_policy.validate(
+        "janedoe-example", {"email": "jane.doe@example.com"}
+    )
+    assert errors == ["The password is too similar to the email."]
+
+
+def test_policy_validate_many() -> None:
+    results = password_policy.validate_many(
+        [("x8Rt!qLm0vZ2-kP", None), ("sandy123", None), ("12345678", None)]
+    )
+    assert results == [
+        [],
+        ["This password is too common."],
+        ["This password is entirely numeric."],
+    ]
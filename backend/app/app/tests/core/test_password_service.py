@@ -0,0 +1,25 @@
+import pytest
+
+from app.core.password_service import PasswordService, PasswordServiceBusy
+from app.tests.utils.utils import random_lower_string
+
+
+def test_hash_and_verify_in_pool() -> None:
+    service = PasswordService(max_workers=1, max_pending=4)
+    password = random_lower_string()
+    try:
+        hashed_password = service.hash(password)
+        assert service.verify(password, hashed_password)
+        assert not service.verify(random_lower_string(), hashed_password)
+    finally:
+        service.shutdown()
+    stats = service.stats()
+    assert stats["calls"] == 3
+    assert stats["pending"] == 0
+
+
+def test_rejects_when_full() -> None:
+    service = PasswordService(max_workers=0, max_pending=0)
+    with pytest.raises(PasswordServiceBusy):
+        service.hash(random_lower_string())
+    assert service.stats()["rejected"] == 1
@@ -1,9 +1,18 @@
+import asyncio
+from typing import Any
+
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.core.cache import RedisCache, TTLCache
+from app.crud.cache import ModelCache
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import Item
 from app.schemas.item import ItemCreate, ItemUpdate
+from app.tests.utils.item import create_random_item
+from app.tests.utils.redis import LocalRedis
 from app.tests.utils.user import create_random_user
-from app.tests.utils.utils import random_lower_string
+from app.tests.utils.utils import count_queries, random_lower_string
 
 
 def test_create_item(db: Session) -> None:
@@ -44,6 +53,7 @@ def test_update_item(db: Session) -> None:
     assert item.title == item2.title
     assert item2.description == description2
     assert item.owner_id == item2.owner_id
+    assert item2.version == 2
 
 
 def test_delete_item(db: Session) -> None:
@@ -59,3 +69,167 @@ def test_delete_item(db: Session) -> None:
     assert item2.title == title
     assert item2.description == description
     assert item2.owner_id == user.id
+
+
+def test_get_item_async(db: Session) -> None:
+    title = random_lower_string()
+    description = random_lower_string()
+    item_in = ItemCreate(title=title, description=description)
+    user = create_random_user(db)
+    item = crud.item.create_with_owner(db=db, obj_in=item_in, owner_id=user.id)
+
+    async def get_item():
+        try:
+            async with AsyncSessionLocal() as async_db:
+                return await crud.item.get_async(async_db, id=item.id)
+        finally:
+            await async_engine.dispose()
+
+    stored_item = asyncio.run(get_item())
+    assert stored_item
+    assert item.id == stored_item.id
+    assert item.title == stored_item.title
+    assert item.owner_id == stored_item.owner_id
+
+
+def test_get_multi_by_owner_cursor(db: Session) -> None:
+    user = create_random_user(db)
+    items = [
+        crud.item.create_with_owner(
+            db=db, obj_in=ItemCreate(title=random_lower_string()), owner_id=user.id
+        )
+        for _ in range(5)
+    ]
+    seen = []
+    cursor = None
+    while True:
+        page = crud.item.get_multi_by_owner(
+            db=db, owner_id=user.id, limit=2, cursor=cursor
+        )
+        seen.extend(item.id for item in page)
+        cursor = crud.item.next_cursor(page, 2)
+        if cursor is None:
+            break
+    assert seen == [item.id for item in items]
+
+
+def test_search_cursor(db: Session) -> None:
+    user = create_random_user(db)
+    word = random_lower_string()
+    items = [
+        crud.item.create_with_owner(
+            db=db, obj_in=ItemCreate(title=f"{word} {i}"), owner_id=user.id
+        )
+        for i in range(5)
+    ]
+    excluded = crud.item.create_with_owner(
+        db=db, obj_in=ItemCreate(title=f"{word} excluded"), owner_id=user.id
+    )
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = crud.item.search(
+            db, q=f"{word} -excluded", owner_id=user.id, limit=2, cursor=cursor
+        )
+        seen.extend(item.id for item in page)
+        if cursor is None:
+            break
+    assert seen == [item.id for item in items]
+    assert excluded.id not in seen
+
+
+def test_create_update_remove_many(db: Session) -> None:
+    user = create_random_user(db)
+    items_in = [ItemCreate(title=random_lower_string()) for _ in range(3)]
+    items = crud.item.create_many(db=db, objs_in=items_in, values={"owner_id": user.id})
+    assert [item.title for item in items] == [item_in.title for item_in in items_in]
+    assert all(item.owner_id == user.id for item in items)
+
+    description = random_lower_string()
+    updated = crud.item.update_many(
+        db=db,
+        objs_in={
+            items[0].id: ItemUpdate(description=description),
+            items[1].id: {"title": "renamed"},
+        },
+    )
+    updated_by_id = {item.id: item for item in updated}
+    assert updated_by_id[items[0].id].description == description
+    assert updated_by_id[items[0].id].title == items[0].title
+    assert updated_by_id[items[1].id].title == "renamed"
+
+    removed = crud.item.remove_many(db=db, ids=[item.id for item in items])
+    assert {item.id for item in removed} == {item.id for item in items}
+    assert crud.item.get(db=db, id=items[0].id) is None
+
+
+def test_writes_are_one_statement(db: Session) -> None:
+    owner_id = create_random_user(db).id
+    with count_queries() as statements:
+        item = crud.item.create_with_owner(
+            db=db, obj_in=ItemCreate(title=random_lower_string()), owner_id=owner_id
+        )
+        assert item.id and item.owner_id == owner_id
+    assert len(statements) == 1
+    with count_queries() as statements:
+        item = crud.item.update(db=db, db_obj=item, obj_in={"description": "updated"})
+        assert item.description == "updated"
+    assert len(statements) == 1
+    with count_queries() as statements:
+        removed = crud.item.remove(db=db, id=item.id)
+        assert removed.title == item.title
+    assert len(statements) == 1
+    assert crud.item.get(db=db, id=item.id) is None
+
+
+def test_get_item_reads_through_cache(db: Session, monkeypatch: Any) -> None:
+    cache = ModelCache(TTLCache(maxsize=10, ttl=30), Item.__table__, ttl=30)
+    monkeypatch.setattr(crud.item, "cache", cache)
+    item = create_random_item(db)
+    crud.item.get(db=db, id=item.id)
+    with SessionLocal() as other_db, count_queries() as statements:
+        stored_item = crud.item.get(db=other_db, id=item.id)
+        assert stored_item.title == item.title
+    assert statements == []
+
+    crud.item.update(db=db, db_obj=item, obj_in={"title": "renamed"})
+    with SessionLocal() as other_db:
+        assert crud.item.get(db=other_db, id=item.id).title == "renamed"
+    id = item.id
+    crud.item.remove_many(db=db, ids=[id])
+    with SessionLocal() as other_db:
+        assert crud.item.get(db=other_db, id=id) is None
+
+
+def test_get_version_ignores_cache(db: Session, monkeypatch: Any) -> None:
+    cache = ModelCache(TTLCache(maxsize=10, ttl=30), Item.__table__, ttl=30)
+    monkeypatch.setattr(crud.item, "cache", cache)
+    item = create_random_item(db)
+    # As cached by a worker that didn't see the update
+    cache.set(item.id, {"version": item.version - 1, "owner_id": item.owner_id})
+
+    async def get_version():
+        try:
+            async with AsyncSessionLocal() as async_db:
+                return await crud.item.get_version_async(
+                    async_db, id=item.id, columns=["owner_id"]
+                )
+        finally:
+            await async_engine.dispose()
+
+    current = asyncio.run(get_version())
+    assert current["version"] == item.version
+    assert current["owner_id"] == item.owner_id
+
+
+def test_get_item_redis_cache(db: Session, monkeypatch: Any) -> None:
+    cache = ModelCache(RedisCache(LocalRedis(), ttl=30), Item.__table__, ttl=30)
+    monkeypatch.setattr(crud.item, "cache", cache)
+    item = create_random_item(db)
+    crud.item.get(db=db, id=item.id)
+    with SessionLocal() as other_db, count_queries() as statements:
+        assert crud.item.get(db=other_db, id=item.id).title == item.title
+    assert statements == []
+    crud.item.remove(db=db, id=item.id)
+    assert cache.get(item.id) is None
+    assert cache.backend.stats()["hits"] == 1
@@ -1,10 +1,15 @@
+from typing import Any, List
+
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.core.password_service import password_service
 from app.core.security import verify_password
+from app.crud import crud_user
+from app.db.session import SessionLocal
 from app.schemas.user import UserCreate, UserUpdate
-from app.tests.utils.utils import random_email, random_lower_string
+from app.tests.utils.utils import count_queries, random_email, random_lower_string
 
 
 def test_create_user(db: Session) -> None:
@@ -16,6 +21,14 @@ def test_create_user(db: Session) -> None:
     assert hasattr(user, "hashed_password")
 
 
+def test_create_user_is_one_statement(db: Session) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    with count_queries() as statements:
+        user = crud.user.create(db, obj_in=user_in)
+        assert user.id and user.is_active
+    assert len(statements) == 1
+
+
 def test_authenticate_user(db: Session) -> None:
     email = random_email()
     password = random_lower_string()
@@ -92,3 +105,45 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_authenticate_cached_user(db: Session, monkeypatch: Any) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(email=email, password=password)
+    user = crud.user.create(db, obj_in=user_in)
+    verified: List[str] = []
+    verify = password_service.verify
+
+    def counting_verify(plain_password: str, hashed_password: str) -> bool:
+        verified.append(plain_password)
+        return verify(plain_password, hashed_password)
+
+    monkeypatch.setattr(password_service, "verify", counting_verify)
+    assert crud.user.authenticate_cached(db, email=email, password=password)
+    assert verified == [password]
+    # Verified recently: no bcrypt
+    assert crud.user.authenticate_cached(db, email=email, password=password)
+    assert verified == [password]
+    wrong_password = random_lower_string()
+    assert crud.user.authenticate_cached(db, email=email, password=wrong_password) is None
+    assert verified == [password, wrong_password]
+    new_password = random_lower_string()
+    crud.user.update(db, db_obj=user, obj_in={"password": new_password})
+    assert crud.user.authenticate_cached(db, email=email, password=password) is None
+    assert crud.user.authenticate_cached(db, email=email, password=new_password)
+
+
+def test_update_user_invalidates_after_commit(db: Session, monkeypatch: Any) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = crud.user.create(db, obj_in=user_in)
+    seen: List[bool] = []
+
+    def invalidate_user_caches(user_id: int) -> None:
+        # What a concurrent request would cache again right now
+        with SessionLocal() as other_db:
+            seen.append(crud.user.get(other_db, id=user_id).is_active)
+
+    monkeypatch.setattr(crud_user, "invalidate_user_caches", invalidate_user_caches)
+    crud.user.update(db, db_obj=user, obj_in={"is_active": False})
+    assert seen == [False]
@@ -0,0 +1,56 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.instrumentation import QueryStats, redact, request_queries
+
+
+def test_queries_are_attributed_to_the_request(db: Session) -> None:
+    stats = QueryStats()
+    token = request_queries.set(stats)
+    try:
+        for i in range(3):
+            db.execute(text("SELECT :i"), {"i": i})
+    finally:
+        request_queries.reset(token)
+    db.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.seconds > 0
+    assert stats.repeated(3) == {"SELECT %(i)s": 3}
+    assert stats.repeated(4) == {}
+
+
+def test_slow_query_log_redacts_parameters(db: Session, caplog, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SLOW_QUERY_SECONDS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        db.execute(text("SELECT :secret"), {"secret": "hunter2"})
+    assert "Slow query" in caplog.text
+    assert "{'secret': '?'}" in caplog.text
+    assert "hunter2" not in caplog.text
+
+
+def test_redact() -> None:
+    assert redact({"a": 1}) == {"a": "?"}
+    assert redact((1, 2)) == ["?", "?"]
+    assert redact([{"a": 1}, {"a": 2}]) == "<2 parameter sets>"
+
+
+def test_debug_headers(
+    client: TestClient, superuser_token_headers: dict, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "DB_DEBUG_HEADERS", True)
+    r = client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert int(r.headers["X-DB-Queries"]) >= 1
+    assert float(r.headers["X-DB-Time"]) > 0
+
+
+def test_n_plus_one_is_logged(
+    client: TestClient, superuser_token_headers: dict, caplog, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 1)
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert "Possible N+1 in GET /api/v1/items/" in caplog.text
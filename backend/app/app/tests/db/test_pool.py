@@ -0,0 +1,25 @@
+from app.db.pool import pool_options
+from app.db.session import engine
+
+
+def test_pool_options_stay_within_budget() -> None:
+    options = pool_options(budget=60, workers=4, engines=2, timeout=30, recycle=1800)
+    assert options["pool_size"] + options["max_overflow"] == 7
+    assert options["pool_size"] == 4
+    assert options["pool_timeout"] == 30
+    assert options["pool_recycle"] == 1800
+
+
+def test_pool_options_keep_one_connection() -> None:
+    options = pool_options(budget=10, workers=64, engines=2, timeout=30, recycle=1800)
+    assert options["pool_size"] == 1
+    assert options["max_overflow"] == 0
+
+
+def test_pool_telemetry() -> None:
+    with engine.connect() as connection:
+        connection.execute("SELECT 1")
+        telemetry = engine.pool.telemetry()
+        assert telemetry["checked_out"] >= 1
+        assert telemetry["saturation"] > 0
+    assert engine.pool.telemetry()["checkouts"] >= 1
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Generator
+
+import pytest
+from sqlalchemy import insert, select, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud
+from app.db.base import Base
+from app.db.routing import ReplicaSet, RoutingSession
+from app.db.session import create_sync_engine, engine
+from app.models import Item, User
+from app.schemas.item import ItemCreate
+from app.tests.utils.user import create_random_user
+
+# Only ever written directly to the replica, so reading it proves where a read went
+REPLICA_ITEM_ID = 2_000_000_000
+
+
+@pytest.fixture(scope="module")
+def replica_engine() -> Generator:
+    """
+    A second local database standing in for a replica: same tables, other rows.
+    """
+    url = make_url(str(engine.url))
+    name = f"{url.database}_replica"
+    admin = engine.execution_options(isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        connection.execute(text(f'CREATE DATABASE "{name}"'))
+    replica = create_sync_engine(url.set(database=name).render_as_string(hide_password=False))
+    Base.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(
+            insert(User.__table__).values(id=1, email="replica@example.com", hashed_password="-")
+        )
+        connection.execute(
+            insert(Item.__table__).values(id=REPLICA_ITEM_ID, title="replica", owner_id=1)
+        )
+    yield replica
+    replica.dispose()
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP DATABASE "{name}"'))
+
+
+def routing_session(replica: Engine) -> Session:
+    return sessionmaker(
+        bind=engine, class_=RoutingSession, replicas=ReplicaSet([replica])
+    )()
+
+
+def read_title(db: Session, id: int) -> str:
+    return db.execute(select(Item.title).where(Item.id == id)).scalar()
+
+
+def test_reads_go_to_replica(replica_engine: Engine) -> None:
+    with routing_session(replica_engine) as db:
+        assert read_title(db, REPLICA_ITEM_ID) == "replica"
+        assert db.get_bind(clause=select(Item)) is replica_engine
+        assert db.get_bind(clause=select(Item).with_for_update()) is engine
+
+
+def test_reads_after_write_go_to_primary(replica_engine: Engine, db: Session) -> None:
+    owner_id = create_random_user(db).id
+    with routing_session(replica_engine) as routed_db:
+        assert read_title(routed_db, REPLICA_ITEM_ID) == "replica"
+        item = crud.item.create_with_owner(
+            routed_db, obj_in=ItemCreate(title="primary"), owner_id=owner_id
+        )
+        assert read_title(routed_db, item.id) == "primary"
+        assert read_title(routed_db, REPLICA_ITEM_ID) is None
+    # A new session, i.e. the next request, reads from the replica again
+    with routing_session(replica_engine) as routed_db:
+        assert read_title(routed_db, REPLICA_ITEM_ID) == "replica"
+
+
+def test_replicas_round_robin(replica_engine: Engine) -> None:
+    replicas = ReplicaSet([replica_engine, engine])
+    make_session = sessionmaker(bind=engine, class_=RoutingSession, replicas=replicas)
+    picked = []
+    for _ in range(4):
+        with make_session() as db:
+            picked.append(db.get_bind(clause=select(Item)))
+    assert picked == [replica_engine, engine, replica_engine, engine]
+
+
+def async_url(sync_engine: Engine) -> str:
+    return sync_engine.url.set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+def test_async_reads_go_to_replica(replica_engine: Engine) -> None:
+    async def read() -> str:
+        primary = create_async_engine(async_url(engine))
+        replica = create_async_engine(async_url(replica_engine))
+        try:
+            async with AsyncSession(
+                primary,
+                sync_session_class=RoutingSession,
+                replicas=ReplicaSet([replica.sync_engine]),
+            ) as db:
+                result = await db.execute(
+                    select(Item.title).where(Item.id == REPLICA_ITEM_ID)
+                )
+                return result.scalar()
+        finally:
+            await primary.dispose()
+            await replica.dispose()
+
+    assert asyncio.run(read()) == "replica"
@@ -0,0 +1,26 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Slow to import and only needed by rare requests, so loaded on first use
+LAZY_PACKAGES = {"amqp", "celery", "emails", "jinja2", "kombu", "nameko"}
+
+
+def test_cold_start_imports() -> None:
+    # A fresh interpreter, as a gunicorn worker imports the app
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-W",
+            "ignore",
+            "-c",
+            "import json, sys, app.main; print(json.dumps(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+    )
+    imported = {name.split(".")[0] for name in json.loads(process.stdout)}
+    assert imported & LAZY_PACKAGES == set()
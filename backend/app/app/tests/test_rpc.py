@@ -0,0 +1,222 @@
+import asyncio
+import socket
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+from nameko.exceptions import RpcTimeout
+
+from app.rpc import RpcPool
+from app.rpc_client import DeadlineQueueConsumer
+
+
+class FakeService:
+    def __init__(self, client: "FakeClient", name: str) -> None:
+        self.client = client
+        self.name = name
+
+    def __getattr__(self, method: str) -> Any:
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if self.client.broken:
+                raise RuntimeError("This consumer has been disconnected")
+            return (self.name, method, args, kwargs)
+
+        return call
+
+
+class FakeProxy:
+    def __init__(self, client: "FakeClient") -> None:
+        self.client = client
+
+    def __getattr__(self, service: str) -> FakeService:
+        return FakeService(self.client, service)
+
+
+class FakeConsumer:
+    timeout = None
+    deadline = None
+
+
+class FakeListener:
+    def __init__(self) -> None:
+        self.queue_consumer = FakeConsumer()
+
+
+class FakeClient:
+    """
+    Stands in for a started `ClusterRpcProxy`, so no broker is needed.
+    """
+
+    def __init__(self) -> None:
+        self.broken = False
+        self.stopped = False
+        self._reply_listener = FakeListener()
+        self._proxy = FakeProxy(self)
+
+    def stop(self) -> None:
+        self.stopped = True
+
+
+class FakePool(RpcPool):
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault("size", 2)
+        kwargs.setdefault("timeout", 5)
+        super().__init__({}, **kwargs)
+        self.clients: List[FakeClient] = []
+
+    def _connect(self, deadline: float) -> Any:
+        client = FakeClient()
+        self.clients.append(client)
+        return client
+
+
+def test_call_reuses_clients() -> None:
+    pool = FakePool()
+    pool.start()
+    assert len(pool.clients) == 2
+    for i in range(5):
+        assert pool.call("tasks", "add", i, y=1) == ("tasks", "add", (i,), {"y": 1})
+    assert len(pool.clients) == 2
+    pool.stop()
+    assert all(client.stopped for client in pool.clients)
+
+
+def test_call_timeout() -> None:
+    pool = FakePool(size=1)
+    with pool.acquire(timeout=0.5) as proxy:
+        assert proxy.client._reply_listener.queue_consumer.timeout == 0.5
+        # The only client is in use
+        with pytest.raises(RpcTimeout):
+            pool.call("tasks", "add", timeout=0.01)
+    pool.call("tasks", "add")
+    assert pool.clients[0]._reply_listener.queue_consumer.timeout == 5
+
+
+def test_call_deadline() -> None:
+    # The wait for a free client counts towards the timeout
+    pool = FakePool(size=1)
+    acquired = threading.Event()
+
+    def hold() -> None:
+        with pool.acquire():
+            acquired.set()
+            time.sleep(0.2)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    acquired.wait()
+    with pool.acquire(timeout=1) as proxy:
+        deadline = proxy.client._reply_listener.queue_consumer.deadline
+        assert deadline - time.monotonic() <= 0.9
+    thread.join()
+
+
+def test_call_reconnects() -> None:
+    pool = FakePool(size=1)
+    pool.call("tasks", "add")
+    pool.clients[0].broken = True
+    with pytest.raises(RuntimeError):
+        pool.call("tasks", "add")
+    assert pool.clients[0].stopped
+    assert pool.call("tasks", "add") == ("tasks", "add", (), {})
+    assert len(pool.clients) == 2
+
+
+def test_call_async() -> None:
+    pool = FakePool()
+
+    async def call_many() -> List[Any]:
+        return await asyncio.gather(
+            *(pool.call_async("tasks", "add", i) for i in range(4))
+        )
+
+    results = asyncio.run(call_many())
+    assert [args for _, _, args, _ in results] == [(i,) for i in range(4)]
+    assert len(pool.clients) <= 2
+
+
+class FakeMessage:
+    def __init__(self, correlation_id: str) -> None:
+        self.properties = {"correlation_id": correlation_id}
+        self.acked = False
+
+    def ack(self) -> None:
+        self.acked = True
+
+
+class FakeReplyEvent:
+    exception = None
+
+    def send_exception(self, exc: Exception) -> None:
+        self.exception = exc
+
+
+class FakeReplyListener:
+    def __init__(self) -> None:
+        self._reply_events: Dict[str, FakeReplyEvent] = {}
+        self.handled: List[Any] = []
+
+    def handle_message(self, body: Any, message: FakeMessage) -> None:
+        self._reply_events.pop(message.properties["correlation_id"])
+        self.handled.append(body)
+
+
+class FakeConnection:
+    def __init__(self, consumer: DeadlineQueueConsumer) -> None:
+        self.consumer = consumer
+        self.timeouts: List[float] = []
+
+    def drain_events(self, timeout: float) -> None:
+        self.timeouts.append(timeout)
+        self.consumer.on_message("late", FakeMessage("timed-out"))
+        self.consumer.on_message("reply", FakeMessage("waited"))
+
+
+def deadline_consumer(deadline: float) -> DeadlineQueueConsumer:
+    consumer = DeadlineQueueConsumer(timeout=1)
+    consumer.deadline = deadline
+    consumer.provider = FakeReplyListener()
+    consumer.consumer = FakeConnection(consumer)
+    consumer.consumer.connection = consumer.consumer
+    consumer._setup_consumer = lambda: None
+    return consumer
+
+
+def test_consumer_drops_late_replies() -> None:
+    consumer = deadline_consumer(time.monotonic() + 1)
+    consumer.provider._reply_events["waited"] = FakeReplyEvent()
+    consumer.get_message("waited")
+    assert consumer.provider.handled == ["reply"]
+    # Nobody waits for the reply to a call that timed out
+    assert consumer.replies == {}
+    assert 0 < consumer.consumer.timeouts[0] <= 1
+
+
+def test_consumer_deadline() -> None:
+    consumer = deadline_consumer(time.monotonic() - 0.1)
+    event = consumer.provider._reply_events["waited"] = FakeReplyEvent()
+    consumer.get_message("waited")
+    assert isinstance(event.exception, RpcTimeout)
+    assert consumer.consumer.timeouts == []
+    assert consumer.provider._reply_events == {}
+
+
+def test_consumer_deadline_while_reconnecting() -> None:
+    consumer = deadline_consumer(time.monotonic() + 0.05)
+    event = consumer.provider._reply_events["waited"] = FakeReplyEvent()
+
+    def drain_events(timeout: float) -> None:
+        time.sleep(timeout)
+        raise ConnectionResetError()
+
+    def setup_consumer() -> None:
+        raise socket.timeout()
+
+    consumer.consumer.drain_events = drain_events
+    consumer._setup_consumer = setup_consumer
+    consumer.connection = consumer.consumer
+    consumer.connection.close = lambda: None
+    consumer.get_message("waited")
+    assert isinstance(event.exception, RpcTimeout)
+    assert consumer.provider._reply_events == {}
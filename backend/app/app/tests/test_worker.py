@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.celery_app import celery_app
+from app.tests.utils.user import create_random_user
+from app.worker import ingest_items, ingest_items_in_batches, purge_item_ingest_batches
+
+
+def test_ingest_items_in_batches(db: Session, monkeypatch: Any) -> None:
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    user = create_random_user(db)
+    user_id = user.id
+    items = [{"title": f"Item {i}", "description": "Ingested"} for i in range(5)]
+    result = ingest_items_in_batches(user_id, items, batch_size=2)
+    batches = result.get()
+    assert [len(ids) for ids in batches] == [2, 2, 1]
+    ingested = crud.item.get_multi_by_owner(db, owner_id=user_id)
+    assert [item.id for item in ingested] == [id for ids in batches for id in ids]
+    assert [item.title for item in ingested] == [item["title"] for item in items]
+
+
+def test_ingest_items_redelivered(db: Session) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    batch_id = str(uuid.uuid4())
+    items = [{"title": f"Item {i}", "description": "Ingested"} for i in range(3)]
+    ids = ingest_items.apply(args=[batch_id, user_id, items]).get()
+    # As delivered again after a commit whose ack was lost
+    assert ingest_items.apply(args=[batch_id, user_id, items]).get() == ids
+    ingested = crud.item.get_multi_by_owner(db, owner_id=user_id)
+    assert [item.id for item in ingested] == ids
+
+
+def test_purge_item_ingest_batches(db: Session) -> None:
+    user = create_random_user(db)
+    user_id = user.id
+    old, recent = str(uuid.uuid4()), str(uuid.uuid4())
+    for batch_id in (old, recent):
+        ingest_items.apply(args=[batch_id, user_id, [{"title": "Ingested"}]]).get()
+    db.execute(
+        update(models.ItemIngestBatch)
+        .where(models.ItemIngestBatch.id == old)
+        .values(created_at=datetime.now(timezone.utc) - timedelta(days=2))
+    )
+    db.commit()
+    assert purge_item_ingest_batches.apply().get() >= 1
+    batch_ids = {batch.id for batch in db.query(models.ItemIngestBatch)}
+    assert old not in batch_ids
+    assert recent in batch_ids
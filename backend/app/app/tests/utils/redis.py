@@ -0,0 +1,42 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalRedis:
+    """
+    In-memory stand-in for the part of the `redis.Redis` client used by
+    `RedisCache`, so the backend can be tested without a server.
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self.down = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        self._check()
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, px: Optional[int] = None) -> bool:
+        self._check()
+        expires = time.monotonic() + px / 1000 if px is not None else None
+        self.data[key] = (expires, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        self._check()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def info(self, section: str) -> Dict[str, Any]:
+        self._check()
+        return {"evicted_keys": 0}
+
+    def _check(self) -> None:
+        if self.down:
+            raise ConnectionError("Connection refused")
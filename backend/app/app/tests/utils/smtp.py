@@ -0,0 +1,75 @@
+import socketserver
+import threading
+from typing import Any, List, Tuple
+
+
+class LocalSMTP:
+    """
+    Minimal SMTP server on localhost, a stand-in for the mail server so the
+    email sending can be tested without one.
+
+    Accepted messages are kept in `messages` as (sender, recipients, data).
+    Codes put in `replies` answer the next MAIL commands instead of 250, e.g.
+    451 to simulate a transient failure.
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.replies: List[int] = []
+        self.connections = 0
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                server.connections += 1
+                server.converse(self)
+
+        self._server = socketserver.ThreadingTCPServer(("localhost", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "LocalSMTP":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def converse(self, handler: socketserver.StreamRequestHandler) -> None:
+        def reply(line: str) -> None:
+            handler.wfile.write(f"{line}\r\n".encode("ascii"))
+
+        reply("220 localhost ESMTP")
+        sender, recipients = "", []
+        for raw in handler.rfile:
+            command = raw.decode("ascii").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 localhost")
+            elif verb == "MAIL":
+                code = self.replies.pop(0) if self.replies else 250
+                if code != 250:
+                    reply(f"{code} Rejected")
+                    continue
+                sender, recipients = command[10:].strip("<>"), []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<>"))
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for line in handler.rfile:
+                    if line == b".\r\n":
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                self.messages.append((sender, recipients, b"".join(lines)))
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                return
+            else:
+                # RSET, NOOP
+                reply("250 OK")
@@ -1,10 +1,13 @@
 import random
 import string
-from typing import Dict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from app.core.config import settings
+from app.db.session import engine
 
 
 def random_lower_string() -> str:
@@ -25,3 +28,20 @@ def get_superuser_token_headers(client: TestClient) -> Dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """
+    Collect the SQL statements run on the sync engine inside the block.
+    """
+    statements: List[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -1,11 +1,117 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from celery import Task, group
+from celery.result import GroupResult
+from celery.signals import worker_init
 from raven import Client
+from sqlalchemy.exc import OperationalError
 
+from app import crud, schemas, utils
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.core.email_templates import template_registry
+from app.core.mailer import is_transient, retry_countdown
+from app.db.session import SessionLocal
 
 client_sentry = Client(settings.SENTRY_DSN)
 
 
+@worker_init.connect
+def preload_email_templates(**kwargs: Any) -> None:
+    # Before the pool forks, so every process starts with them compiled
+    template_registry().preload()
+
+
 @celery_app.task(acks_late=True)
 def test_celery(word: str) -> str:
     return f"test task return {word}"
+
+
+def retry_email(task: Task, error: Exception, **kwargs: Any) -> None:
+    if not is_transient(error):
+        raise error
+    raise task.retry(
+        exc=error,
+        countdown=retry_countdown(task.request.retries),
+        max_retries=settings.EMAIL_MAX_RETRIES,
+        **kwargs,
+    )
+
+
+@celery_app.task(acks_late=True, bind=True)
+def send_new_account_email(
+    self: Task, email_to: str, username: str, password: Optional[str] = None
+) -> None:
+    # `password` is ignored, only sent by the API before it was left out, so
+    # the tasks still queued with it don't fail
+    try:
+        utils.send_new_account_email(email_to=email_to, username=username)
+    except Exception as e:
+        retry_email(self, e)
+
+
+@celery_app.task(acks_late=True, bind=True)
+def send_reset_password_email(self: Task, email_to: str, email: str, token: str) -> None:
+    try:
+        utils.send_reset_password_email(email_to=email_to, email=email, token=token)
+    except Exception as e:
+        retry_email(self, e)
+
+
+@celery_app.task(acks_late=True, bind=True)
+def send_emails(self: Task, messages: List[Dict[str, Any]]) -> int:
+    """
+    Send a batch of emails, given as `utils.send_email` arguments, over one
+    SMTP connection. Only the messages that failed transiently are retried.
+    """
+    errors = utils.send_emails(messages)
+    retry = [message for message, e in zip(messages, errors) if e and is_transient(e)]
+    if retry:
+        error = next(e for e in errors if e and is_transient(e))
+        retry_email(self, error, args=[retry])
+    return sum(e is None for e in errors)
+
+
+@celery_app.task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=3)
+def ingest_items(batch_id: str, owner_id: int, items: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert a batch of items, given as `ItemCreate` fields, for `owner_id` in
+    a single transaction and return their ids.
+
+    Late acks and retries deliver a batch again when its worker died, or its
+    connection dropped, during or after the commit: the batch is only
+    inserted once per `batch_id`, later deliveries return the same ids.
+    """
+    objs_in = [schemas.ItemCreate(**item) for item in items]
+    with SessionLocal() as db:
+        return crud.item.create_many_with_owner_once(
+            db, key=batch_id, objs_in=objs_in, owner_id=owner_id
+        )
+
+
+@celery_app.task
+def purge_item_ingest_batches() -> int:
+    """
+    Delete the batch records of `ingest_items` older than
+    ITEM_INGEST_BATCH_RETENTION_HOURS, scheduled hourly by celery beat.
+    """
+    before = datetime.now(timezone.utc) - timedelta(
+        hours=settings.ITEM_INGEST_BATCH_RETENTION_HOURS
+    )
+    with SessionLocal() as db:
+        return crud.item.purge_ingest_batches(db, before=before)
+
+
+def ingest_items_in_batches(
+    owner_id: int, items: Sequence[Dict[str, Any]], batch_size: Optional[int] = None
+) -> GroupResult:
+    """
+    Queue `items` for `owner_id` as `ingest_items` tasks of `batch_size` rows.
+    """
+    batch_size = batch_size or settings.ITEM_INGEST_BATCH_SIZE
+    return group(
+        ingest_items.s(str(uuid.uuid4()), owner_id, list(items[start : start + batch_size]))
+        for start in range(0, len(items), batch_size)
+    ).apply_async()
@@ -0,0 +1,267 @@
+"""
+Throughput and latency of the main API endpoints, with regression checks.
+
+    python -m benchmarks.api [--users N] [--items-per-user N] [--requests N]
+        [--concurrency N] [--baseline FILE] [--save-baseline FILE] [--tolerance F]
+
+Seeds `--users` users owning `--items-per-user` items each in the app's
+database, logs them in, then drives the real ASGI app in-process with
+`--concurrency` client threads: login, `/users/me`, the item list, get,
+create, update, delete and export. Prints throughput and p50/p95/p99 per
+scenario as JSON. The seeded rows are removed at exit.
+
+With `--baseline`, every scenario is compared to a report saved earlier with
+`--save-baseline`: it regresses when its p95 grows, or its throughput drops,
+by more than `--tolerance`, and the command then exits with status 1.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+from requests import Response
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.main import app
+from app.models import Item, User
+
+API = settings.API_V1_STR
+PASSWORD = "benchmark-password"
+SCOPES = "me items:read items:create items:update items:delete"
+
+Request = Callable[[TestClient, int], Response]
+
+
+def seed(db: Session, *, users: int, items_per_user: int) -> List[Dict[str, Any]]:
+    run = uuid.uuid4().hex[:8]
+    hashed_password = get_password_hash(PASSWORD)
+    rows = db.execute(
+        insert(User.__table__)
+        .values(
+            [
+                {
+                    "email": f"bench-{run}-{i}@example.com",
+                    "hashed_password": hashed_password,
+                    "full_name": f"Benchmark {i}",
+                    "is_active": True,
+                    "is_superuser": False,
+                }
+                for i in range(users)
+            ]
+        )
+        .returning(User.__table__.c.id, User.__table__.c.email)
+    ).all()
+    db.execute(
+        text(
+            "INSERT INTO item (title, description, owner_id) "
+            "SELECT 'bench item ' || g, 'benchmark item', u.id "
+            "FROM unnest(CAST(:owner_ids AS integer[])) AS u(id), "
+            "generate_series(1, :items) AS g"
+        ),
+        {"owner_ids": [row.id for row in rows], "items": items_per_user},
+    )
+    db.commit()
+    db.execute(text("ANALYZE item"))
+    item_ids: Dict[int, List[int]] = {row.id: [] for row in rows}
+    for item_id, owner_id in db.execute(
+        text("SELECT id, owner_id FROM item WHERE owner_id = ANY(:owner_ids)"),
+        {"owner_ids": list(item_ids)},
+    ):
+        item_ids[owner_id].append(item_id)
+    return [
+        {"id": row.id, "email": row.email, "item_ids": item_ids[row.id]} for row in rows
+    ]
+
+
+def cleanup(db: Session, users: List[Dict[str, Any]]) -> None:
+    owner_ids = [user["id"] for user in users]
+    db.query(Item).filter(Item.owner_id.in_(owner_ids)).delete(synchronize_session=False)
+    db.query(User).filter(User.id.in_(owner_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def login(client: TestClient, email: str) -> Response:
+    return client.post(
+        f"{API}/login/access-token",
+        data={
+            "grant_type": "password",
+            "username": email,
+            "password": PASSWORD,
+            "scope": SCOPES,
+        },
+    )
+
+
+def scenarios(users: List[Dict[str, Any]]) -> Dict[str, Request]:
+    """
+    One request per scenario, in run order; `i` numbers the requests of a
+    scenario, and request `i` is made by user `i % len(users)`.
+
+    Update and delete work on the items made by the create scenario, so the
+    seeded items are left as they were and every scenario sees the same data.
+    """
+    rng = random.Random(0)
+
+    def user(i: int) -> Dict[str, Any]:
+        return users[i % len(users)]
+
+    def create(client: TestClient, i: int) -> Response:
+        response = client.post(
+            f"{API}/items/",
+            headers=user(i)["headers"],
+            json={"title": f"created {i}", "description": "benchmark item"},
+        )
+        if response.ok:
+            user(i)["created"].append(response.json()["id"])
+        return response
+
+    def update(client: TestClient, i: int) -> Response:
+        created = user(i)["created"]
+        return client.put(
+            f"{API}/items/{created[i // len(users) % len(created)]}",
+            headers=user(i)["headers"],
+            json={"title": f"updated {i}"},
+        )
+
+    def delete(client: TestClient, i: int) -> Response:
+        return client.delete(
+            f"{API}/items/{user(i)['created'].pop()}", headers=user(i)["headers"]
+        )
+
+    return {
+        "login": lambda client, i: login(client, user(i)["email"]),
+        "users_me": lambda client, i: client.get(
+            f"{API}/users/me", headers=user(i)["headers"]
+        ),
+        "items_list": lambda client, i: client.get(
+            f"{API}/items/", headers=user(i)["headers"], params={"limit": 100}
+        ),
+        "items_get": lambda client, i: client.get(
+            f"{API}/items/{rng.choice(user(i)['item_ids'])}",
+            headers=user(i)["headers"],
+        ),
+        "items_create": create,
+        "items_update": update,
+        "items_delete": delete,
+        "items_export": lambda client, i: client.get(
+            f"{API}/items/export", headers=user(i)["headers"]
+        ),
+    }
+
+
+def percentile(timings: List[float], q: float) -> float:
+    return timings[min(int(len(timings) * q), len(timings) - 1)]
+
+
+def run(
+    client: TestClient, request: Request, *, requests: int, concurrency: int
+) -> Dict[str, float]:
+    def call(i: int) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            request(client, i).raise_for_status()
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    timings = sorted(timing for timing in results if timing is not None)
+    return {
+        "requests": requests,
+        "errors": requests - len(timings),
+        "requests_per_second": len(timings) / elapsed,
+        "p50_ms": percentile(timings, 0.50) * 1000 if timings else 0.0,
+        "p95_ms": percentile(timings, 0.95) * 1000 if timings else 0.0,
+        "p99_ms": percentile(timings, 0.99) * 1000 if timings else 0.0,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> Dict[str, Dict[str, Any]]:
+    comparison = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = (
+            result["requests_per_second"] / base["requests_per_second"] - 1
+            if base["requests_per_second"]
+            else 0.0
+        )
+        comparison[name] = {
+            "p95_change": p95_change,
+            "requests_per_second_change": rps_change,
+            "regressed": p95_change > tolerance or rps_change < -tolerance,
+        }
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--items-per-user", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    users = seed(db, users=args.users, items_per_user=args.items_per_user)
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        with TestClient(app) as client:
+            for user in users:
+                token = login(client, user["email"]).json()["access_token"]
+                user["headers"] = {"Authorization": f"Bearer {token}"}
+                user["created"] = []
+            for name, request in scenarios(users).items():
+                requests = args.login_requests if name == "login" else args.requests
+                results[name] = run(
+                    client, request, requests=requests, concurrency=args.concurrency
+                )
+    finally:
+        cleanup(db, users)
+        db.close()
+
+    report: Dict[str, Any] = {
+        "config": {
+            key: getattr(args, key)
+            for key in ("users", "items_per_user", "requests", "concurrency")
+        },
+        "scenarios": results,
+    }
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+        report["comparison"] = compare(results, baseline, args.tolerance)
+        regressed = any(c["regressed"] for c in report["comparison"].values())
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
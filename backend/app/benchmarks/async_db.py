@@ -0,0 +1,82 @@
+"""
+Throughput and latency of the sync (threadpool) and async database paths.
+
+    python -m benchmarks.async_db [--concurrency N] [--requests N]
+
+Both endpoints list one page of items, through `get_db` + `crud.item.get_multi`
+and `get_async_db` + `crud.item.get_multi_async` respectively, and are driven
+by `--concurrency` client threads against the same database as the app.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import async_engine
+from app.dependencies import get_async_db, get_db
+
+app = FastAPI()
+app.add_event_handler("shutdown", async_engine.dispose)
+
+
+@app.get("/sync")
+def sync_items(db: Session = Depends(get_db)) -> Any:
+    return [item.id for item in crud.item.get_multi(db, limit=20)]
+
+
+@app.get("/async")
+async def async_items(db: AsyncSession = Depends(get_async_db)) -> Any:
+    return [item.id for item in await crud.item.get_multi_async(db, limit=20)]
+
+
+def percentile(timings: List[float], q: float) -> float:
+    return timings[min(int(len(timings) * q), len(timings) - 1)]
+
+
+def run(client: TestClient, path: str, concurrency: int, requests: int) -> Dict[str, float]:
+    def call(_: int) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            client.get(path).raise_for_status()
+        except Exception:
+            # e.g. QueuePool timeouts once every threadpool thread waits on the pool
+            return None
+        return time.perf_counter() - start
+
+    client.get(path)  # warm up the pool
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    timings = sorted(timing for timing in results if timing is not None)
+    return {
+        "requests_per_second": len(timings) / elapsed,
+        "errors": requests - len(timings),
+        "p50_ms": percentile(timings, 0.50) * 1000 if timings else 0.0,
+        "p99_ms": percentile(timings, 0.99) * 1000 if timings else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        results = {
+            path: run(client, path, args.concurrency, args.requests)
+            for path in ("/sync", "/async")
+        }
+    print(json.dumps({"concurrency": args.concurrency, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput of item ingestion through Celery by batch size.
+
+    python -m benchmarks.celery_ingest [--rows N] [--batch-sizes N [N ...]]
+        [--concurrency N] [--prefetch-multiplier N]
+
+Runs a worker in this process, on an in-memory broker and result backend,
+and for each batch size queues `--rows` items of a throwaway user as
+`ingest_items` tasks of that many rows, then waits for all of them. The
+items land in the app's database and are removed at exit, along with the
+user and its ingest batches.
+
+The in-memory transport is consumed by a polling loop that refills the
+prefetch window at most every two seconds, so the prefetch multiplier
+defaults to a high value here: with the production setting of 1, the loop,
+not the ingestion, is what gets measured.
+"""
+import argparse
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict
+
+from celery.contrib.testing.worker import start_worker
+
+from app.core.celery_app import celery_app
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.models import Item, ItemIngestBatch, User
+from app.worker import ingest_items_in_batches
+
+
+def run(owner_id: int, rows: int, batch_size: int) -> Dict[str, Any]:
+    items = [
+        {"title": f"ingested {i}", "description": "benchmark item"} for i in range(rows)
+    ]
+    start = time.perf_counter()
+    result = ingest_items_in_batches(owner_id, items, batch_size=batch_size)
+    ingested = sum(len(ids) for ids in result.get(timeout=3600, interval=0.001))
+    elapsed = time.perf_counter() - start
+    return {
+        "tasks": len(result.results),
+        "rows": ingested,
+        "seconds": elapsed,
+        "rows_per_second": ingested / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--prefetch-multiplier", type=int, default=64)
+    args = parser.parse_args()
+    # Each task of batch size 1 is a tiny INSERT, don't log them as N+1s or slow
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+
+    celery_app.conf.update(
+        broker_url="memory://",
+        # The in-memory transport polls, poll often so the broker isn't what's measured
+        broker_transport_options={"polling_interval": 0.001},
+        result_backend="cache+memory://",
+        worker_prefetch_multiplier=args.prefetch_multiplier,
+    )
+    db = SessionLocal()
+    user = User(
+        email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+        hashed_password=get_password_hash("benchmark-password"),
+    )
+    db.add(user)
+    db.commit()
+    owner_id = user.id
+    results = {}
+    try:
+        with start_worker(
+            celery_app,
+            pool="threads",
+            concurrency=args.concurrency,
+            queues=["main-queue"],
+            perform_ping_check=False,
+            loglevel="WARNING",
+        ):
+            for batch_size in args.batch_sizes:
+                results[batch_size] = run(owner_id, args.rows, batch_size)
+    finally:
+        db.query(Item).filter(Item.owner_id == owner_id).delete()
+        db.query(ItemIngestBatch).filter(ItemIngestBatch.owner_id == owner_id).delete()
+        db.query(User).filter(User.id == owner_id).delete()
+        db.commit()
+        db.close()
+
+    print(
+        json.dumps(
+            {"rows": args.rows, "concurrency": args.concurrency, "batch_sizes": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
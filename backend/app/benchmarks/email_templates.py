@@ -0,0 +1,116 @@
+"""
+Cost of building and sending emails: templates read per message vs the template registry.
+
+    python -m benchmarks.email_templates [--messages N] [--batch N] [--templates DIR]
+
+Sends `--messages` new account emails to a null transport, which only
+serializes them, the way `send_new_account_email` used to (read the HTML
+file and compile a `JinjaTemplate` per message) and through the template
+registry with batches of `--batch` messages sent by an `SMTPPool`. No
+mail server is needed.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import emails
+from emails.template import JinjaTemplate
+
+from app import utils
+from app.core.config import settings
+from app.core.mailer import SMTPPool
+
+TEMPLATE = "new_account.html"
+
+
+class NullTransport:
+    """
+    Stands in for an SMTP connection: messages are serialized, then dropped.
+    """
+
+    def sendmail(self, from_addr: str, to_addrs: List[str], msg: Any, **kwargs: Any) -> None:
+        msg.as_bytes()
+
+    def close(self) -> None:
+        pass
+
+
+class NullPool(SMTPPool):
+    def _connect(self) -> Any:
+        return NullTransport()
+
+
+def environment(i: int) -> Dict[str, Any]:
+    return {
+        "project_name": settings.PROJECT_NAME,
+        "username": f"user{i}@example.com",
+        "email": f"user{i}@example.com",
+        "link": settings.SERVER_HOST,
+    }
+
+
+def send_legacy(messages: int) -> None:
+    transport = NullTransport()
+    for i in range(messages):
+        with open(Path(settings.EMAIL_TEMPLATES_DIR) / TEMPLATE) as f:
+            template_str = f.read()
+        message = emails.Message(
+            subject=JinjaTemplate(f"{settings.PROJECT_NAME} - New account"),
+            html=JinjaTemplate(template_str),
+            mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+        )
+        message.send(to=f"user{i}@example.com", render=environment(i), smtp=transport)
+
+
+def send_registry(messages: int, batch: int) -> None:
+    pool = NullPool({}, size=1, max_messages=messages)
+    for start in range(0, messages, batch):
+        pool.send_many(
+            [
+                utils.build_email(
+                    f"user{i}@example.com",
+                    f"{settings.PROJECT_NAME} - New account",
+                    TEMPLATE,
+                    environment(i),
+                )
+                for i in range(start, min(start + batch, messages))
+            ]
+        )
+
+
+def timed(func: Any, *args: Any) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument(
+        "--templates",
+        default=str(Path(__file__).parents[1] / "app" / "email-templates" / "build"),
+    )
+    args = parser.parse_args()
+    # Read by the registry on first use
+    settings.EMAIL_TEMPLATES_DIR = args.templates
+    settings.EMAILS_FROM_EMAIL = settings.EMAILS_FROM_EMAIL or "bench@example.com"
+
+    results = {}
+    for name, func, func_args in (
+        ("legacy", send_legacy, (args.messages,)),
+        ("registry", send_registry, (args.messages, args.batch)),
+    ):
+        seconds = timed(func, *func_args)
+        results[name] = {
+            "seconds": seconds,
+            "messages_per_second": args.messages / seconds,
+        }
+    print(json.dumps({"messages": args.messages, "paths": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Import time of the app, by package, as reported by `python -X importtime`.
+
+    python -m benchmarks.import_time [--module NAME] [--runs N] [--top N]
+
+Imports `--module` (the app that every gunicorn worker imports before its
+first request, by default) `--runs` times, each in a fresh interpreter, and
+reports the median total import time, the packages that took the most time
+to import (the self time of their modules, summed) and the modules that
+took the most time including their own imports. Modules imported by the
+interpreter before `--module` aren't counted.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# (module, self microseconds, cumulative microseconds)
+Timings = List[Tuple[str, int, int]]
+
+
+def import_timings(module: str) -> Timings:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    timings = []
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def median_ms(values: List[int], runs: int) -> float:
+    # A module missing from a run, imported before, counts as 0
+    return statistics.median(values + [0] * (runs - len(values))) / 1000
+
+
+def top(times: Dict[str, List[int]], runs: int, n: int) -> Dict[str, float]:
+    medians = {name: median_ms(values, runs) for name, values in times.items()}
+    return {
+        name: round(ms, 1)
+        for name, ms in sorted(medians.items(), key=lambda item: -item[1])[:n]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    totals = []
+    packages: Dict[str, List[int]] = defaultdict(list)
+    modules: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        timings = import_timings(args.module)
+        totals.append(sum(self_us for _, self_us, _ in timings))
+        run_packages: Dict[str, int] = defaultdict(int)
+        for name, self_us, cumulative_us in timings:
+            run_packages[name.split(".")[0]] += self_us
+            modules[name].append(cumulative_us)
+        for name, self_us in run_packages.items():
+            packages[name].append(self_us)
+
+    print(
+        json.dumps(
+            {
+                "module": args.module,
+                "runs": args.runs,
+                "total_ms": median_ms(totals, args.runs),
+                "packages_ms": top(packages, args.runs, args.top),
+                "modules_cumulative_ms": top(modules, args.runs, args.top),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
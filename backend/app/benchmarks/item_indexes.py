@@ -0,0 +1,134 @@
+"""
+Insert throughput and owner listing latency of the legacy vs redesigned item indexes.
+
+    python -m benchmarks.item_indexes [--rows N] [--owners N] [--batch N] [--limit N]
+
+For each index layout, creates an `item` table in a throwaway schema, loads
+`--rows` items spread over `--owners` owners in INSERT ... SELECT batches
+of `--batch` rows, then times `crud.item.get_multi_by_owner` for the first
+page and a middle page (by cursor) of sampled owners. The schemas are
+dropped at exit.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.pagination import encode_cursor
+from app.db.session import engine
+
+LAYOUTS = {
+    # Indexes of the first revision
+    "legacy": [
+        "CREATE INDEX ix_item_id ON item (id)",
+        "CREATE INDEX ix_item_title ON item (title)",
+        "CREATE INDEX ix_item_description ON item (description)",
+    ],
+    "redesigned": ["CREATE INDEX ix_item_owner_id_id ON item (owner_id, id)"],
+}
+
+
+def load(db: Session, *, rows: int, owners: int, batch: int) -> float:
+    start = time.perf_counter()
+    for first in range(1, rows + 1, batch):
+        db.execute(
+            text(
+                "INSERT INTO item (title, description, owner_id) "
+                "SELECT 'item ' || md5(g::text), md5((g * 7)::text), g % :owners + 1 "
+                "FROM generate_series(:first, :last) AS g"
+            ),
+            {"first": first, "last": min(first + batch - 1, rows), "owners": owners},
+        )
+        db.commit()
+    return rows / (time.perf_counter() - start)
+
+
+def listing_ms(db: Session, owner_ids: List[int], limit: int, cursor: Any) -> float:
+    timings = []
+    for owner_id in owner_ids:
+        start = time.perf_counter()
+        crud.item.get_multi_by_owner(
+            db, owner_id=owner_id, limit=limit, cursor=cursor(owner_id)
+        )
+        timings.append(time.perf_counter() - start)
+        db.expunge_all()
+    return statistics.median(timings) * 1000
+
+
+def run_layout(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    schema = f"bench_{name}"
+    with engine.connect() as connection:
+        with connection.begin():
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {schema}"))
+            # Unqualified names, like the ones crud.item emits, resolve to the scratch schema
+            connection.execute(text(f"SET search_path TO {schema}"))
+            connection.execute(
+                text(
+                    "CREATE TABLE item (id serial PRIMARY KEY, title varchar, "
+                    "description varchar, owner_id integer, "
+                    "version integer NOT NULL DEFAULT 1)"
+                )
+            )
+            for statement in LAYOUTS[name]:
+                connection.execute(text(statement))
+        db = Session(bind=connection)
+        try:
+            inserts_per_second = load(
+                db, rows=args.rows, owners=args.owners, batch=args.batch
+            )
+            db.execute(text("ANALYZE item"))
+            owner_ids = random.Random(0).sample(
+                range(1, args.owners + 1), min(args.samples, args.owners)
+            )
+            middle = {
+                owner_id: db.execute(
+                    text(
+                        "SELECT id FROM item WHERE owner_id = :owner_id "
+                        "ORDER BY id OFFSET :offset LIMIT 1"
+                    ),
+                    {"owner_id": owner_id, "offset": args.rows // args.owners // 2},
+                ).scalar()
+                for owner_id in owner_ids
+            }
+            return {
+                "inserts_per_second": round(inserts_per_second),
+                "first_page_ms": listing_ms(db, owner_ids, args.limit, lambda _: None),
+                "middle_page_ms": listing_ms(
+                    db,
+                    owner_ids,
+                    args.limit,
+                    lambda owner_id: encode_cursor([middle[owner_id]]),
+                ),
+            }
+        finally:
+            db.close()
+            with connection.begin():
+                connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {name: run_layout(name, args) for name in LAYOUTS}
+    print(
+        json.dumps(
+            {"rows": args.rows, "owners": args.owners, "layouts": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
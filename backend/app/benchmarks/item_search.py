@@ -0,0 +1,183 @@
+"""
+Latency of item search through the GIN-indexed search vector vs substring matching.
+
+    python -m benchmarks.item_search [--rows N] [--owners N] [--batch N] [--limit N]
+
+Creates an `item` table with the generated `search_vector` column in a
+throwaway schema and loads `--rows` items of random words, spread over
+`--owners` owners, in INSERT ... SELECT batches of `--batch` rows, then
+builds the GIN index. For sampled words, times `crud.item.search` for the
+first and the next page (by cursor), over all items and over one owner's,
+against the `ILIKE '%word%'` scan clients had to fall back to. Words are
+sampled among common, medium and rare ones, since ranking costs grow with
+the number of matches. The schema is dropped at exit.
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.db.session import engine
+from app.models.item import SEARCH_CONFIG
+
+SCHEMA = "bench_search"
+# Distinct words of the corpus, `term0` ... `term{VOCABULARY - 1}`
+VOCABULARY = 10_000
+# Query words by frequency: the first words of the vocabulary are the most common
+FREQUENCIES = {"common": (0, 10), "medium": (100, 300), "rare": (5000, VOCABULARY)}
+
+
+def load(db: Session, *, rows: int, owners: int, batch: int) -> float:
+    start = time.perf_counter()
+    # Skewed towards the first words, roughly like word frequencies in text
+    word = f"'term' || floor({VOCABULARY} * power(random(), 3))::int"
+    for first in range(1, rows + 1, batch):
+        db.execute(
+            text(
+                "INSERT INTO item (title, description, owner_id) "
+                f"SELECT {word} || ' ' || {word}, "
+                f"{word} || ' ' || {word} || ' ' || md5(g::text) || ' ' || {word}, "
+                "g % :owners + 1 "
+                "FROM generate_series(:first, :last) AS g"
+            ),
+            {"first": first, "last": min(first + batch - 1, rows), "owners": owners},
+        )
+        db.commit()
+    return rows / (time.perf_counter() - start)
+
+
+def timed_ms(queries: List[Callable[[], Any]]) -> float:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        query()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def substring(db: Session, word: str, owner_id: Any, limit: int) -> Any:
+    return db.execute(
+        text(
+            "SELECT * FROM item WHERE (title ILIKE :pattern OR description ILIKE :pattern) "
+            "AND (CAST(:owner_id AS integer) IS NULL OR owner_id = :owner_id) "
+            "ORDER BY id LIMIT :limit"
+        ),
+        {"pattern": f"%{word}%", "owner_id": owner_id, "limit": limit},
+    ).all()
+
+
+def run(
+    db: Session, args: argparse.Namespace, words: List[str], owners: List[Any]
+) -> Dict[str, float]:
+    cursors = [
+        crud.item.search(db, q=word, owner_id=owner_id, limit=args.limit)[1]
+        for word, owner_id in zip(words, owners)
+    ]
+    db.expunge_all()
+
+    def search(word: str, owner_id: Any, cursor: Any = None) -> Callable[[], Any]:
+        def query() -> Any:
+            crud.item.search(
+                db, q=word, owner_id=owner_id, limit=args.limit, cursor=cursor
+            )
+            db.expunge_all()
+
+        return query
+
+    return {
+        "search_first_page_ms": timed_ms(
+            [search(word, owner_id) for word, owner_id in zip(words, owners)]
+        ),
+        "search_next_page_ms": timed_ms(
+            [
+                search(word, owner_id, cursor)
+                for word, owner_id, cursor in zip(words, owners, cursors)
+            ]
+        ),
+        "substring_first_page_ms": timed_ms(
+            [
+                lambda word=word, owner_id=owner_id: substring(
+                    db, word, owner_id, args.limit
+                )
+                for word, owner_id in zip(words, owners)
+            ]
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+    # Loading and scanning a large table is slow on purpose
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+
+    with engine.connect() as connection:
+        with connection.begin():
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            # Unqualified names, like the ones crud.item emits, resolve to the scratch schema
+            connection.execute(text(f"SET search_path TO {SCHEMA}"))
+            connection.execute(
+                text(
+                    "CREATE TABLE item (id serial PRIMARY KEY, title varchar, "
+                    "description varchar, owner_id integer, "
+                    "version integer NOT NULL DEFAULT 1, "
+                    "search_vector tsvector GENERATED ALWAYS AS ("
+                    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+                    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+                    ") STORED)"
+                )
+            )
+            connection.execute(text("CREATE INDEX ON item (owner_id, id)"))
+        db = Session(bind=connection)
+        try:
+            inserts_per_second = load(
+                db, rows=args.rows, owners=args.owners, batch=args.batch
+            )
+            start = time.perf_counter()
+            db.execute(text("CREATE INDEX ON item USING gin (search_vector)"))
+            db.commit()
+            index_seconds = time.perf_counter() - start
+            db.execute(text("ANALYZE item"))
+            rng = random.Random(0)
+            owner_ids = [rng.randint(1, args.owners) for _ in range(args.samples)]
+            results: Dict[str, Any] = {}
+            for frequency, (low, high) in FREQUENCIES.items():
+                words = [f"term{rng.randrange(low, high)}" for _ in range(args.samples)]
+                results[frequency] = {
+                    "all": run(db, args, words, [None] * args.samples),
+                    "owner": run(db, args, words, owner_ids),
+                }
+        finally:
+            db.close()
+            with connection.begin():
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "owners": args.owners,
+                "inserts_per_second": round(inserts_per_second),
+                "gin_index_seconds": round(index_seconds, 1),
+                "words": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
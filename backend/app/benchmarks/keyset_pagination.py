@@ -0,0 +1,104 @@
+"""
+Latency of deep pages: OFFSET vs keyset (cursor) pagination.
+
+    python -m benchmarks.keyset_pagination [--rows N] [--limit N]
+
+Seeds `--rows` items for a throwaway owner with a single INSERT ... SELECT,
+then times `crud.item.get_multi_by_owner` at increasing page depths with
+`skip` and with the equivalent `cursor`. The seeded rows are removed at exit.
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.pagination import encode_cursor
+from app.db.session import SessionLocal
+from app.models import Item, User
+
+
+def timed(func: Callable[[], object], repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def seed(db: Session, rows: int) -> int:
+    owner = User(email=f"bench-{uuid.uuid4().hex}@example.com", hashed_password="-")
+    db.add(owner)
+    db.commit()
+    db.execute(
+        text(
+            "INSERT INTO item (title, description, owner_id) "
+            "SELECT 'bench ' || g, 'benchmark item', :owner_id "
+            "FROM generate_series(1, :rows) AS g"
+        ),
+        {"owner_id": owner.id, "rows": rows},
+    )
+    db.commit()
+    db.execute(text("ANALYZE item"))
+    return owner.id
+
+
+def cleanup(db: Session, owner_id: int) -> None:
+    db.query(Item).filter(Item.owner_id == owner_id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == owner_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    owner_id = seed(db, args.rows)
+    results: List[Dict[str, float]] = []
+    try:
+        page = 1
+        while (page - 1) * args.limit < args.rows:
+            skip = (page - 1) * args.limit
+            # Cursor of the row just before the page, as the previous page returned it
+            last_id = db.execute(
+                text(
+                    "SELECT id FROM item WHERE owner_id = :owner_id "
+                    "ORDER BY id OFFSET :offset LIMIT 1"
+                ),
+                {"owner_id": owner_id, "offset": max(skip - 1, 0)},
+            ).scalar()
+            cursor = encode_cursor([last_id]) if skip else None
+            results.append(
+                {
+                    "page": page,
+                    "offset_ms": timed(
+                        lambda: crud.item.get_multi_by_owner(
+                            db, owner_id=owner_id, skip=skip, limit=args.limit
+                        )
+                    ),
+                    "cursor_ms": timed(
+                        lambda: crud.item.get_multi_by_owner(
+                            db, owner_id=owner_id, limit=args.limit, cursor=cursor
+                        )
+                    ),
+                }
+            )
+            db.expunge_all()
+            page *= 10
+    finally:
+        cleanup(db, owner_id)
+        db.close()
+    print(json.dumps({"rows": args.rows, "limit": args.limit, "pages": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Latency and RSS of the `password_common` validator lookup, before and after
+the precompiled index.
+
+    python -m benchmarks.password_common [--iterations N]
+
+"before" re-reads and gunzips the password list into a set on every call,
+which is what `UserBase.password_common` used to do; "after" queries the
+mmap-ed index built by `app.core.common_passwords`.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.core.common_passwords import CommonPasswordIndex, build_index, read_password_list
+
+PASSWORD_LIST_PATH = (
+    Path(__file__).resolve().parent.parent / "app" / "schemas" / "common-passwords.txt.gz"
+)
+CANDIDATES = ["welcome", "sandy123", "x8Rt!qLm0vZ2", "correct horse battery staple"]
+
+
+def rss_kib() -> int:
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def before(password: str) -> bool:
+    return password in set(read_password_list(PASSWORD_LIST_PATH))
+
+
+def measure(check: Callable[[str], bool], iterations: int) -> Dict[str, float]:
+    rss_start = rss_kib()
+    timings: List[float] = []
+    for i in range(iterations):
+        password = CANDIDATES[i % len(CANDIDATES)]
+        start = time.perf_counter()
+        check(password)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99) - 1] * 1e6,
+        "rss_delta_kib": rss_kib() - rss_start,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {"before": measure(before, args.iterations)}
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = build_index(
+            read_password_list(PASSWORD_LIST_PATH), Path(tmp) / "common-passwords.idx"
+        )
+        index = CommonPasswordIndex(index_path)
+        results["after"] = measure(index.__contains__, args.iterations * 100)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
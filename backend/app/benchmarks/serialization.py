@@ -0,0 +1,76 @@
+"""
+Cost of serializing a page of items: the response_model path vs the fast JSON path.
+
+    python -m benchmarks.serialization [--sizes N [N ...]] [--repeat N]
+
+Builds pages of transient `Item` objects and times, per page size, what
+FastAPI does with a `List[schemas.Item]` response model (validation,
+`jsonable_encoder`, stdlib `json`) against `fast_json` with the compiled
+`serialize_item`. No database is needed.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+from app.api.responses import fast_json, serialize_item
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response", type_=List[schemas.Item])
+    loop = asyncio.new_event_loop()
+
+    def response_model(items: List[models.Item]) -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=items)
+        )
+        return JSONResponse(content).body
+
+    results = []
+    for size in args.sizes:
+        items = [
+            models.Item(
+                id=i, title=f"item {i}", description="benchmark item", owner_id=1
+            )
+            for i in range(size)
+        ]
+        assert json.loads(response_model(items)) == json.loads(
+            fast_json(items, serialize_item).body
+        )
+        response_model_ms = timed(lambda: response_model(items), args.repeat)
+        fast_json_ms = timed(lambda: fast_json(items, serialize_item).body, args.repeat)
+        results.append(
+            {
+                "page_size": size,
+                "response_model_ms": response_model_ms,
+                "fast_json_ms": fast_json_ms,
+                "speedup": response_model_ms / fast_json_ms,
+            }
+        )
+    loop.close()
+    print(json.dumps({"repeat": args.repeat, "pages": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
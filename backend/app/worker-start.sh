@@ -3,4 +3,7 @@ set -e
 
 python /app/app/celeryworker_pre_start.py
 
-celery worker -A app.worker -l info -Q main-queue -c 1
+# Concurrency, prefetch and acks come from the settings, see app/core/celery_app.py
+# -B also runs the periodic tasks of beat_schedule; with several workers each
+# one runs them, which the purge tasks don't mind
+celery -A app.worker worker -l info -Q main-queue -B -s /tmp/celerybeat-schedule